@@ -202,7 +202,7 @@ def telegram_auth_view(request):
     from apps.telegram_bot.models import TelegramUser
     
     try:
-        telegram_user = TelegramUser.objects.get(telegram_id=telegram_id)
+        telegram_user = TelegramUser.objects.select_related('user').get(telegram_id=telegram_id)
         user = telegram_user.user
     except TelegramUser.DoesNotExist:
         # Create new user and Telegram user
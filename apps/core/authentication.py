@@ -96,7 +96,7 @@ class TelegramAuthentication(BaseAuthentication):
         
         try:
             # Try to get existing Telegram user
-            telegram_user = TelegramUser.objects.get(telegram_id=telegram_id)
+            telegram_user = TelegramUser.objects.select_related('user').get(telegram_id=telegram_id)
             return telegram_user.user
         except TelegramUser.DoesNotExist:
             # Create new user and Telegram user
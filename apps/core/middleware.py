@@ -7,13 +7,33 @@ from django.http import JsonResponse
 from apps.core.rate_limiting import get_rate_limit_info, AnonRateThrottle, UserRateThrottle
 
 
+def rate_limit_headers_exempt(view_func):
+    """
+    Mark a view as exempt from the rate limit header middleware.
+    
+    For views with their own throttling, such as the Telegram webhook,
+    where the headers would only cost a Redis round trip per request.
+    """
+    view_func.rate_limit_headers_exempt = True
+    return view_func
+
+
 class RateLimitHeadersMiddleware(MiddlewareMixin):
     """
     Middleware to add rate limit headers to responses.
     """
     
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        """Remember views that opted out with rate_limit_headers_exempt."""
+        if getattr(view_func, 'rate_limit_headers_exempt', False):
+            request.rate_limit_headers_exempt = True
+        return None
+    
     def process_response(self, request, response):
         """Add rate limit headers to response."""
+        if getattr(request, 'rate_limit_headers_exempt', False):
+            return response
+        
         try:
             # Get rate limit info for the request
             if request.user.is_authenticated:
@@ -43,6 +63,9 @@ class RateLimitExceededMiddleware(MiddlewareMixin):
     
     def process_response(self, request, response):
         """Handle rate limit exceeded responses."""
+        if getattr(request, 'rate_limit_headers_exempt', False):
+            return response
+        
         if response.status_code == 429:  # Too Many Requests
             try:
                 if request.user.is_authenticated:
@@ -75,6 +75,26 @@ class RedisRateLimiter:
             'window': window,
             'identifier': identifier
         }
+    
+    def hit(self, key: str, window: int) -> int:
+        """
+        Count a request in a fixed window with one INCR + EXPIRE round trip.
+        
+        Args:
+            key: Unique key for rate limiting (e.g., ip_address)
+            window: Time window in seconds
+            
+        Returns:
+            Number of requests counted in the current window
+        """
+        redis_key = f"rate_limit:{key}:{int(time.time()) // window}"
+        
+        pipe = self.redis_client.pipeline()
+        pipe.incr(redis_key)
+        pipe.expire(redis_key, window)
+        count, _ = pipe.execute()
+        
+        return count
 
 
 class RedisThrottle(BaseThrottle):
@@ -92,12 +112,19 @@ class RedisThrottle(BaseThrottle):
         """
         self.rate = rate
         self.scope = scope
-        self.limiter = RedisRateLimiter()
+        self._limiter = None
         
         # Parse rate limit
         self.limit, self.period = self._parse_rate(rate)
         self.window = self._get_window_seconds(self.period)
     
+    @property
+    def limiter(self) -> RedisRateLimiter:
+        """Redis limiter, connected on first use rather than per instance."""
+        if self._limiter is None:
+            self._limiter = RedisRateLimiter()
+        return self._limiter
+    
     def _parse_rate(self, rate: str) -> tuple:
         """Parse rate string into limit and period."""
         if '/' not in rate:
@@ -138,6 +165,9 @@ class RedisThrottle(BaseThrottle):
     
     def allow_request(self, request, view) -> bool:
         """Check if request should be allowed."""
+        if not getattr(settings, 'RATE_LIMIT_ENABLED', True):
+            return True
+        
         cache_key = self.get_cache_key(request, view)
         
         result = self.limiter.is_allowed(
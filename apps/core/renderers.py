@@ -0,0 +1,61 @@
+"""
+Response renderers for the Noti API.
+"""
+
+import math
+
+import orjson
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+# Dates, times, Decimals and lazy strings go through DRF's own encoder so they
+# are formatted exactly as the stock JSONRenderer formats them
+_ORJSON_OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+_drf_default = JSONEncoder().default
+
+
+def _has_non_finite_float(data):
+    """Return True if NaN or an infinity occurs anywhere in the data."""
+    stack = [data]
+    while stack:
+        value = stack.pop()
+        if isinstance(value, float):
+            if not math.isfinite(value):
+                return True
+        elif isinstance(value, dict):
+            stack.extend(value.values())
+        elif isinstance(value, (list, tuple)):
+            stack.extend(value)
+    return False
+
+
+class ORJSONRenderer(JSONRenderer):
+    """
+    JSON renderer that encodes with orjson instead of the stdlib json module.
+    
+    orjson only produces compact UTF-8, so indented, ASCII-only or
+    non-compact output is left to JSONRenderer, as is anything orjson
+    cannot encode (integers beyond 64 bits).
+    """
+    
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        
+        if (self.ensure_ascii or not self.compact
+                or self.get_indent(accepted_media_type, renderer_context or {}) is not None):
+            return super().render(data, accepted_media_type, renderer_context)
+        
+        try:
+            ret = orjson.dumps(data, default=_drf_default, option=_ORJSON_OPTIONS)
+        except TypeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        
+        # orjson writes NaN and infinities as null; let JSONRenderer raise (or
+        # emit them) as STRICT_JSON dictates. Only bodies with a null can hide one
+        if b'null' in ret and _has_non_finite_float(data):
+            return super().render(data, accepted_media_type, renderer_context)
+        
+        # Escape the line and paragraph separators as JSONRenderer does, so the
+        # output stays a strict JavaScript subset
+        return ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
@@ -2,35 +2,43 @@
 Tests for core app API endpoints.
 """
 
+from datetime import datetime, timezone
+from decimal import Decimal
 from django.test import TestCase
 from django.contrib.auth.models import User
 from django.urls import reverse
+from rest_framework.renderers import JSONRenderer
 from rest_framework.test import APITestCase
 from rest_framework import status
 from rest_framework.authtoken.models import Token
 from apps.core.models import UserProfile, SystemSettings, AuditLog
+from apps.core.renderers import ORJSONRenderer
 
 
 class CoreAPITestCase(APITestCase):
     """Test cases for core API endpoints."""
     
-    def setUp(self):
-        """Set up test data."""
-        self.user = User.objects.create_user(
+    @classmethod
+    def setUpTestData(cls):
+        """Set up test data shared by every test in the class."""
+        cls.user = User.objects.create_user(
             username='testuser',
             email='test@example.com',
             password='testpass123'
         )
-        self.token = Token.objects.create(user=self.user)
-        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        cls.token = Token.objects.create(user=cls.user)
         
-        self.profile = UserProfile.objects.create(
-            user=self.user,
+        cls.profile = UserProfile.objects.create(
+            user=cls.user,
             phone_number='+1234567890',
             timezone='America/New_York',
             language='en'
         )
     
+    def setUp(self):
+        """Authenticate the per-test API client."""
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+    
     def test_user_list_api(self):
         """Test user list API endpoint."""
         url = reverse('user-list')
@@ -243,23 +251,26 @@ class HealthCheckAPITestCase(APITestCase):
 class APIPaginationTestCase(APITestCase):
     """Test cases for API pagination."""
     
-    def setUp(self):
-        """Set up test data."""
-        self.user = User.objects.create_user(
+    @classmethod
+    def setUpTestData(cls):
+        """Set up test data shared by every test in the class."""
+        cls.user = User.objects.create_user(
             username='testuser',
             email='test@example.com',
             password='testpass123'
         )
-        self.token = Token.objects.create(user=self.user)
+        cls.token = Token.objects.create(user=cls.user)
+        
+        # Create multiple users for pagination testing; none of them logs
+        # in, so one INSERT with unusable passwords skips hashing entirely
+        User.objects.bulk_create([
+            User(username=f'user{i}', email=f'user{i}@example.com', password='!')
+            for i in range(25)
+        ])
+    
+    def setUp(self):
+        """Authenticate the per-test API client."""
         self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
-        
-        # Create multiple users for pagination testing
-        for i in range(25):
-            User.objects.create_user(
-                username=f'user{i}',
-                email=f'user{i}@example.com',
-                password='testpass123'
-            )
     
     def test_user_list_pagination(self):
         """Test user list pagination."""
@@ -288,16 +299,20 @@ class APIPaginationTestCase(APITestCase):
 class APIFilteringTestCase(APITestCase):
     """Test cases for API filtering."""
     
-    def setUp(self):
-        """Set up test data."""
-        self.user = User.objects.create_user(
+    @classmethod
+    def setUpTestData(cls):
+        """Set up test data shared by every test in the class."""
+        cls.user = User.objects.create_user(
             username='testuser',
             email='test@example.com',
             password='testpass123',
             first_name='Test',
             last_name='User'
         )
-        self.token = Token.objects.create(user=self.user)
+        cls.token = Token.objects.create(user=cls.user)
+    
+    def setUp(self):
+        """Authenticate the per-test API client."""
         self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
     
     def test_user_search_by_username(self):
@@ -332,14 +347,18 @@ class APIFilteringTestCase(APITestCase):
 class APIErrorHandlingTestCase(APITestCase):
     """Test cases for API error handling."""
     
-    def setUp(self):
-        """Set up test data."""
-        self.user = User.objects.create_user(
+    @classmethod
+    def setUpTestData(cls):
+        """Set up test data shared by every test in the class."""
+        cls.user = User.objects.create_user(
             username='testuser',
             email='test@example.com',
             password='testpass123'
         )
-        self.token = Token.objects.create(user=self.user)
+        cls.token = Token.objects.create(user=cls.user)
+    
+    def setUp(self):
+        """Authenticate the per-test API client."""
         self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
     
     def test_user_not_found(self):
@@ -376,3 +395,42 @@ class APIErrorHandlingTestCase(APITestCase):
         
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
         self.assertIn('username', response.data)
+
+
+class ORJSONRendererTestCase(TestCase):
+    """Test cases for the orjson-backed API renderer."""
+    
+    def test_render_matches_drf_json_renderer(self):
+        """Test orjson output is byte-identical to DRF's JSONRenderer."""
+        data = {
+            'id': 1,
+            'title': 'Привет',
+            'created_at': datetime(2024, 1, 2, 3, 4, 5, 678901, tzinfo=timezone.utc),
+            'amount': Decimal('1.50'),
+            'tags': ['a', 'b'],
+            'meta': None,
+        }
+        
+        self.assertEqual(ORJSONRenderer().render(data), JSONRenderer().render(data))
+        self.assertEqual(ORJSONRenderer().render(None), b'')
+    
+    def test_render_edge_cases_match_drf_json_renderer(self):
+        """Test separators, indentation and big integers render as DRF does."""
+        cases = {
+            'line separators': ({'text': 'a\u2028b\u2029c'}, None),
+            'indent': ({'tags': ['a', 'b'], 'meta': {'n': 1}}, 'application/json; indent=4'),
+            'big integer': ({'id': 2 ** 64}, None),
+        }
+        for name, (data, media_type) in cases.items():
+            with self.subTest(name):
+                self.assertEqual(
+                    ORJSONRenderer().render(data, media_type),
+                    JSONRenderer().render(data, media_type)
+                )
+    
+    def test_render_rejects_nan(self):
+        """Test non-finite floats raise like DRF's strict JSONRenderer."""
+        for value in (float('nan'), float('inf')):
+            with self.subTest(value=value):
+                with self.assertRaises(ValueError):
+                    ORJSONRenderer().render({'score': value, 'meta': None})
@@ -2,10 +2,12 @@
 Tests for rate limiting functionality.
 """
 
-from django.test import TestCase, RequestFactory
+from django.test import SimpleTestCase, TestCase, RequestFactory
 from django.contrib.auth.models import User
+from django.http import HttpResponse
+from apps.core.middleware import RateLimitHeadersMiddleware, rate_limit_headers_exempt
 from apps.core.rate_limiting import RedisRateLimiter, UserRateThrottle, AnonRateThrottle
-from unittest.mock import patch
+from unittest.mock import Mock, patch
 
 
 class RateLimitingTestCase(TestCase):
@@ -86,3 +88,38 @@ class RateLimitingTestCase(TestCase):
         keys = self.limiter.redis_client.keys(pattern)
         if keys:
             self.limiter.redis_client.delete(*keys)
+
+
+class RedisRateLimiterMockTestCase(SimpleTestCase):
+    """Test cases for the rate limiter against an injected Redis client."""
+    
+    def test_rate_limiter_hit_with_mock_redis(self):
+        """Test fixed-window hit counting with a mocked Redis client."""
+        mock_redis = Mock()
+        mock_redis.pipeline.return_value.execute.return_value = [3, True]
+        
+        limiter = RedisRateLimiter(redis_client=mock_redis)
+        count = limiter.hit("test_key", 60)
+        
+        self.assertEqual(count, 3)
+        pipe = mock_redis.pipeline.return_value
+        redis_key = pipe.incr.call_args[0][0]
+        self.assertTrue(redis_key.startswith("rate_limit:test_key:"))
+        pipe.expire.assert_called_once_with(redis_key, 60)
+
+
+class RateLimitHeadersMiddlewareTestCase(SimpleTestCase):
+    """Test cases for the rate limit header middleware."""
+    
+    @patch('apps.core.middleware.get_rate_limit_info')
+    def test_rate_limit_headers_exempt_view(self, mock_get_rate_limit_info):
+        """Test exempt views skip the rate limit header lookup."""
+        view = rate_limit_headers_exempt(lambda request: HttpResponse())
+        middleware = RateLimitHeadersMiddleware(view)
+        request = RequestFactory().post('/webhook/telegram/')
+        
+        middleware.process_view(request, view, (), {})
+        response = middleware.process_response(request, HttpResponse())
+        
+        mock_get_rate_limit_info.assert_not_called()
+        self.assertNotIn('X-RateLimit-Limit', response)
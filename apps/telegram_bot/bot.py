@@ -11,8 +11,11 @@ from typing import Optional, Dict, Any, TYPE_CHECKING
 if TYPE_CHECKING:
     from telegram.ext import Application
 
+from asgiref.sync import sync_to_async
 from django.conf import settings
 from django.contrib.auth.models import User
+from django.db import close_old_connections
+from django.db.models import F
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup, BotCommand, Bot
 from telegram.ext import (
     Application, CommandHandler, MessageHandler, CallbackQueryHandler,
@@ -51,7 +54,14 @@ class NotiBot:
             return None
         
         try:
-            self.application = Application.builder().token(settings.TELEGRAM_BOT_TOKEN).build()
+            # PTB already pools Bot API connections (256 by default); under a
+            # burst, wait for a free one rather than failing after 1 second
+            self.application = (
+                Application.builder()
+                .token(settings.TELEGRAM_BOT_TOKEN)
+                .pool_timeout(5.0)
+                .build()
+            )
             assert self.application is not None  # Help linter understand this is not None
             self.bot = self.application.bot
             self._setup_handlers()
@@ -122,7 +132,7 @@ Use /help to see all available commands.
             reply_markup = InlineKeyboardMarkup(keyboard)
             
             await update.message.reply_text(welcome_text, reply_markup=reply_markup)
-            await self._log_message(update, "start_command")
+            await self._log_message(update, "start_command", user=user)
             
         except Exception as e:
             logger.error(f"Error in start_command: {e}")
@@ -162,7 +172,9 @@ Need help? Contact support or use /start to return to the main menu.
             django_user = user.user
             
             # Get recent notifications
-            notifications = Notification.objects.filter(user=django_user).order_by('-created_at')[:10]
+            notifications = await sync_to_async(list)(
+                Notification.objects.filter(user=django_user).order_by('-created_at')[:10]
+            )
             
             if not notifications:
                 await update.message.reply_text("📭 You have no notifications yet.")
@@ -182,7 +194,7 @@ Need help? Contact support or use /start to return to the main menu.
             reply_markup = InlineKeyboardMarkup(keyboard)
             
             await update.message.reply_text(text, reply_markup=reply_markup, parse_mode='Markdown')
-            await self._log_message(update, "notifications_command")
+            await self._log_message(update, "notifications_command", user=user)
             
         except Exception as e:
             logger.error(f"Error in notifications_command: {e}")
@@ -219,7 +231,7 @@ Use the buttons below to manage your settings.
             reply_markup = InlineKeyboardMarkup(keyboard)
             
             await update.message.reply_text(text, reply_markup=reply_markup, parse_mode='Markdown')
-            await self._log_message(update, "settings_command")
+            await self._log_message(update, "settings_command", user=user)
             
         except Exception as e:
             logger.error(f"Error in settings_command: {e}")
@@ -231,13 +243,13 @@ Use the buttons below to manage your settings.
             user = await self._get_or_create_telegram_user(update)
             
             # Get user stats
-            total_messages = BotMessage.objects.filter(user=user).count()
-            bot_messages = BotMessage.objects.filter(user=user, is_bot_message=True).count()
+            total_messages = await BotMessage.objects.filter(user=user).acount()
+            bot_messages = await BotMessage.objects.filter(user=user, is_bot_message=True).acount()
             user_messages = total_messages - bot_messages
             
             # Get notification stats
-            total_notifications = Notification.objects.filter(user=user.user).count()
-            unread_notifications = Notification.objects.filter(user=user.user, is_read=False).count()
+            total_notifications = await Notification.objects.filter(user=user.user).acount()
+            unread_notifications = await Notification.objects.filter(user=user.user, is_read=False).acount()
             
             text = f"""
 📊 **Your Statistics**
@@ -264,7 +276,7 @@ Use the buttons below to manage your settings.
             reply_markup = InlineKeyboardMarkup(keyboard)
             
             await update.message.reply_text(text, reply_markup=reply_markup, parse_mode='Markdown')
-            await self._log_message(update, "stats_command")
+            await self._log_message(update, "stats_command", user=user)
             
         except Exception as e:
             logger.error(f"Error in stats_command: {e}")
@@ -296,7 +308,7 @@ Use the buttons below to manage your settings.
             message = update.message.text
             
             # Create notification
-            notification = Notification.objects.create(
+            notification = await Notification.objects.acreate(
                 user=user.user,
                 title=title,
                 message=message,
@@ -314,7 +326,7 @@ Use the buttons below to manage your settings.
             
             # Clear user data
             context.user_data.clear()
-            await self._log_message(update, "notification_created")
+            await self._log_message(update, "notification_created", user=user)
             return ConversationHandler.END
             
         except Exception as e:
@@ -370,7 +382,7 @@ Use the buttons below to manage your settings.
                     "I'm not sure how to respond to that. Use /help to see available commands or /start for the main menu."
                 )
             
-            await self._log_message(update, "regular_message")
+            await self._log_message(update, "regular_message", user=user)
             
         except Exception as e:
             logger.error(f"Error handling message: {e}")
@@ -378,17 +390,25 @@ Use the buttons below to manage your settings.
     
     async def _get_or_create_telegram_user(self, update: Update) -> TelegramUser:
         """Get or create TelegramUser from update."""
-        telegram_user = update.effective_user
-        
+        return await sync_to_async(self._sync_telegram_user)(update.effective_user)
+    
+    def _sync_telegram_user(self, telegram_user) -> TelegramUser:
+        """Get or create the TelegramUser; sync, as the ORM may not run on the event loop."""
         try:
-            user = TelegramUser.objects.get(telegram_id=telegram_user.id)
-            # Update user info
-            user.username = telegram_user.username or ''
-            user.first_name = telegram_user.first_name or ''
-            user.last_name = telegram_user.last_name or ''
-            user.language_code = telegram_user.language_code or 'en'
-            user.is_premium = getattr(telegram_user, 'is_premium', False)
-            user.save()
+            user = TelegramUser.objects.select_related('user').get(telegram_id=telegram_user.id)
+            # Update user info, writing only the fields that actually changed
+            profile = {
+                'username': telegram_user.username or '',
+                'first_name': telegram_user.first_name or '',
+                'last_name': telegram_user.last_name or '',
+                'language_code': telegram_user.language_code or 'en',
+                'is_premium': bool(telegram_user.is_premium),
+            }
+            changed = [field for field, value in profile.items() if getattr(user, field) != value]
+            if changed:
+                for field in changed:
+                    setattr(user, field, profile[field])
+                user.save(update_fields=changed + ['updated_at'])
             return user
         except TelegramUser.DoesNotExist:
             # Create Django user
@@ -407,43 +427,50 @@ Use the buttons below to manage your settings.
                 first_name=telegram_user.first_name or '',
                 last_name=telegram_user.last_name or '',
                 language_code=telegram_user.language_code or 'en',
-                is_premium=getattr(telegram_user, 'is_premium', False)
+                is_premium=bool(telegram_user.is_premium)
             )
             return user
     
-    async def _log_message(self, update: Update, message_type: str):
-        """Log message to database."""
+    async def _log_message(self, update: Update, message_type: str, user: Optional[TelegramUser] = None):
+        """Log message to database, reusing the handler's user when given."""
         try:
-            user = await self._get_or_create_telegram_user(update)
+            if user is None:
+                user = await self._get_or_create_telegram_user(update)
             
-            BotMessage.objects.create(
-                user=user,
-                message_id=update.message.message_id,
-                message_type='text',
-                content=update.message.text or '',
-                is_bot_message=False
+            await sync_to_async(self._save_message)(
+                user, update.message.message_id, update.message.text or ''
             )
             
-            # Update analytics
-            self._update_analytics()
-            
         except Exception as e:
             logger.error(f"Error logging message: {e}")
     
+    def _save_message(self, user: TelegramUser, message_id: int, text: str):
+        """Store an incoming message and count it in today's analytics."""
+        BotMessage.objects.create(
+            user=user,
+            message_id=message_id,
+            message_type='text',
+            content={'text': text},
+            is_bot_message=False
+        )
+        
+        # Update analytics
+        self._update_analytics()
+    
     def _update_analytics(self):
         """Update daily analytics."""
         try:
             today = datetime.now().date()
-            analytics, created = BotAnalytics.objects.get_or_create(date=today)
-            
-            if created:
-                analytics.total_users = TelegramUser.objects.count()
-                analytics.active_users = 1
-                analytics.messages_received = 1
-            else:
-                analytics.messages_received += 1
-            
-            analytics.save()
+            # Increment in place: one UPDATE for every message but the day's first
+            updated = BotAnalytics.objects.filter(date=today).update(
+                messages_received=F('messages_received') + 1
+            )
+            if not updated:
+                BotAnalytics.objects.get_or_create(date=today, defaults={
+                    'total_users': TelegramUser.objects.count(),
+                    'active_users': 1,
+                    'messages_received': 1,
+                })
         except Exception as e:
             logger.error(f"Error updating analytics: {e}")
     
@@ -476,6 +503,9 @@ Use the buttons below to manage your settings.
 # Global bot instance
 bot_instance = None
 
+# Event loop reused by every update a worker process handles outside a loop
+_worker_loop: Optional[asyncio.AbstractEventLoop] = None
+
 
 def get_bot() -> Optional[NotiBot]:
     """Get the global bot instance."""
@@ -485,13 +515,48 @@ def get_bot() -> Optional[NotiBot]:
     return bot_instance
 
 
+def _get_worker_loop() -> asyncio.AbstractEventLoop:
+    """
+    Get this process's long-lived event loop, creating it on first use.
+    
+    The bot's HTTPX connection pool is bound to the loop it was opened on;
+    a fresh loop per update, as asyncio.run makes, would discard the pooled
+    keep-alive connections to the Bot API and redo TLS on every update.
+    """
+    global _worker_loop
+    if _worker_loop is None or _worker_loop.is_closed():
+        _worker_loop = asyncio.new_event_loop()
+    return _worker_loop
+
+
+async def _process_update_in_worker(application: 'Application', update: Update):
+    """Process an update, initializing the application on first use."""
+    # A no-op once initialized; opens the Bot API client on the worker loop
+    await application.initialize()
+    try:
+        await application.process_update(update)
+    finally:
+        # Handlers' queries ran on asgiref's sync thread, which no request
+        # cycle ever cleans up; drop its connection once it is stale
+        await sync_to_async(close_old_connections)()
+
+
 def handle_telegram_update(update_data: Dict[str, Any]):
     """Handle incoming Telegram update from webhook."""
     try:
         bot = get_bot()
         if bot and bot.application:
-            # Process update synchronously
-            asyncio.create_task(bot.application.process_update(update_data))
+            # PTB handlers only match Update objects, never raw dicts
+            update = Update.de_json(update_data, bot.bot)
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                # No running loop (e.g. a Celery worker): process to completion
+                _get_worker_loop().run_until_complete(
+                    _process_update_in_worker(bot.application, update)
+                )
+            else:
+                loop.create_task(bot.application.process_update(update))
             logger.info(f"Processed Telegram update: {update_data.get('update_id')}")
         else:
             logger.warning("Bot not initialized, cannot process update")
@@ -6,7 +6,9 @@ from django.core.management.base import BaseCommand
 from django.conf import settings
 from apps.telegram_bot.models import BotCommand as BotCommandModel
 from apps.telegram_bot.bot import get_bot
+from apps.telegram_bot.registry import get_active_commands
 import asyncio
+import io
 
 
 class Command(BaseCommand):
@@ -73,17 +75,21 @@ class Command(BaseCommand):
             self.stdout.write("No bot commands found.")
             return
         
-        self.stdout.write("Bot Commands:")
-        self.stdout.write("-" * 50)
+        # Build the listing in memory and emit it with a single write
+        buf = io.StringIO()
+        buf.write("Bot Commands:\n")
+        buf.write("-" * 50 + "\n")
         
         for cmd in commands:
             status = "✅" if cmd.is_active else "❌"
             auth = "🔒" if cmd.requires_auth else "🔓"
             admin = "👑" if cmd.admin_only else "👤"
             
-            self.stdout.write(
-                f"{status} /{cmd.command} - {cmd.description} {auth} {admin}"
+            buf.write(
+                f"{status} /{cmd.command} - {cmd.description} {auth} {admin}\n"
             )
+        
+        self.stdout.write(buf.getvalue(), ending='')
 
     def create_command(self, options):
         """Create a new bot command."""
@@ -174,14 +180,16 @@ class Command(BaseCommand):
 
     def sync_commands(self):
         """Sync commands from database to bot handlers."""
-        commands = BotCommandModel.objects.filter(is_active=True)
+        commands = get_active_commands()
         
-        self.stdout.write(f"Syncing {commands.count()} commands...")
+        self.stdout.write(f"Syncing {len(commands)} commands...")
         
         # This would integrate with the bot's command registration system
         # For now, just show what would be synced
+        buf = io.StringIO()
         for cmd in commands:
-            self.stdout.write(f"  - /{cmd.command}: {cmd.description}")
+            buf.write(f"  - /{cmd.command}: {cmd.description}\n")
+        self.stdout.write(buf.getvalue(), ending='')
         
         self.stdout.write(
             self.style.SUCCESS('Commands synced successfully')
@@ -195,7 +203,7 @@ class Command(BaseCommand):
             )
             return
         
-        commands = BotCommandModel.objects.filter(is_active=True)
+        commands = get_active_commands()
         
         if not commands:
             self.stdout.write("No active commands to set.")
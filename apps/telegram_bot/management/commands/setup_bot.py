@@ -5,6 +5,26 @@ Management command to setup Telegram bot webhook.
 from django.core.management.base import BaseCommand
 from django.conf import settings
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+# Shared session so repeated invocations reuse the TLS connection to the
+# Telegram API. setWebhook is idempotent, so POST is safe to retry; 429
+# responses honour Telegram's Retry-After header.
+_session = requests.Session()
+_session.mount('https://', HTTPAdapter(
+    pool_connections=1,
+    pool_maxsize=1,
+    max_retries=Retry(
+        total=3,
+        backoff_factor=0.5,
+        status_forcelist=[429, 500, 502, 503, 504],
+        allowed_methods=frozenset(['POST']),
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    ),
+))
 
 
 class Command(BaseCommand):
@@ -26,9 +46,10 @@ class Command(BaseCommand):
         webhook_url = f"{settings.TELEGRAM_WEBHOOK_URL}/webhook/telegram/"
         
         try:
-            response = requests.post(
+            response = _session.post(
                 f"https://api.telegram.org/bot{settings.TELEGRAM_BOT_TOKEN}/setWebhook",
-                data={'url': webhook_url}
+                data={'url': webhook_url},
+                timeout=10
             )
             
             if response.status_code == 200:
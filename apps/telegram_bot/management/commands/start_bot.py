@@ -4,7 +4,6 @@ Management command to start the Telegram bot.
 
 import asyncio
 import signal
-import sys
 from django.core.management.base import BaseCommand
 from django.conf import settings
 from apps.telegram_bot.bot import get_bot
@@ -40,15 +39,6 @@ class Command(BaseCommand):
             )
             return
 
-        # Setup signal handlers for graceful shutdown
-        def signal_handler(signum, frame):
-            self.stdout.write(self.style.WARNING('\nShutting down bot...'))
-            asyncio.create_task(bot.stop())
-            sys.exit(0)
-
-        signal.signal(signal.SIGINT, signal_handler)
-        signal.signal(signal.SIGTERM, signal_handler)
-
         try:
             if options['webhook']:
                 self.stdout.write(
@@ -62,10 +52,24 @@ class Command(BaseCommand):
                 self.stdout.write(
                     self.style.SUCCESS('Starting bot in polling mode...')
                 )
-                asyncio.run(bot.start_polling())
+                asyncio.run(self._run_polling(bot))
         except KeyboardInterrupt:
             self.stdout.write(self.style.WARNING('\nBot stopped by user'))
         except Exception as e:
             self.stdout.write(
                 self.style.ERROR(f'Error starting bot: {e}')
             )
+
+    async def _run_polling(self, bot):
+        """Poll until SIGINT/SIGTERM, then await a clean bot shutdown."""
+        stop_event = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, stop_event.set)
+
+        await bot.start_polling()
+        try:
+            await stop_event.wait()
+        finally:
+            self.stdout.write(self.style.WARNING('\nShutting down bot...'))
+            await bot.stop()
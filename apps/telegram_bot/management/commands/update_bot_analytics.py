@@ -0,0 +1,24 @@
+"""
+Management command to rebuild daily bot analytics.
+"""
+
+from django.core.management.base import BaseCommand
+from apps.telegram_bot.tasks import rollup_bot_analytics
+
+
+class Command(BaseCommand):
+    help = 'Rebuild daily bot analytics from the message log'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=1,
+            help='Number of days to rebuild, counting back from today'
+        )
+
+    def handle(self, *args, **options):
+        written = rollup_bot_analytics(days=options['days'])
+        self.stdout.write(
+            self.style.SUCCESS(f'Updated analytics for {written} day(s)')
+        )
@@ -0,0 +1,22 @@
+# Generated by Django 4.2.7 on 2026-10-15 10:00
+
+from django.db import migrations, models
+import django.db.models.functions.text
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('telegram_bot', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='telegramuser',
+            name='telegram_bo_usernam_30d6d2_idx',
+        ),
+        migrations.AddIndex(
+            model_name='telegramuser',
+            index=models.Index(django.db.models.functions.text.Lower('username'), name='tguser_username_lower_idx'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.7 on 2026-10-15 10:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('telegram_bot', '0002_telegramuser_username_lower_idx'),
+    ]
+
+    operations = [
+        migrations.AlterUniqueTogether(
+            name='botanalytics',
+            unique_together=set(),
+        ),
+        migrations.AddConstraint(
+            model_name='botanalytics',
+            constraint=models.UniqueConstraint(fields=('date',), name='botanalytics_date_uniq'),
+        ),
+    ]
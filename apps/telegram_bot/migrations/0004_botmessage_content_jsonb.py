@@ -0,0 +1,71 @@
+# Generated by Django 4.2.7 on 2026-10-15 10:00
+
+from django.db import migrations, models
+
+
+def text_to_json(apps, schema_editor):
+    BotMessage = apps.get_model('telegram_bot', 'BotMessage')
+    batch = []
+    for message in BotMessage.objects.only('id', 'content').iterator(chunk_size=500):
+        message.content_json = {'text': message.content} if message.content else {}
+        batch.append(message)
+        if len(batch) >= 500:
+            BotMessage.objects.bulk_update(batch, ['content_json'])
+            batch = []
+    if batch:
+        BotMessage.objects.bulk_update(batch, ['content_json'])
+
+
+def json_to_text(apps, schema_editor):
+    BotMessage = apps.get_model('telegram_bot', 'BotMessage')
+    batch = []
+    for message in BotMessage.objects.only('id', 'content_json').iterator(chunk_size=500):
+        payload = message.content_json
+        message.content = payload.get('text', '') if isinstance(payload, dict) else str(payload)
+        batch.append(message)
+        if len(batch) >= 500:
+            BotMessage.objects.bulk_update(batch, ['content'])
+            batch = []
+    if batch:
+        BotMessage.objects.bulk_update(batch, ['content'])
+
+
+def create_content_gin_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(
+        'CREATE INDEX botmsg_content_gin_idx ON telegram_bot_botmessage '
+        'USING GIN (content jsonb_path_ops)'
+    )
+
+
+def drop_content_gin_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('DROP INDEX IF EXISTS botmsg_content_gin_idx')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('telegram_bot', '0003_botanalytics_date_uniq'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='botmessage',
+            name='content_json',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.RunPython(text_to_json, json_to_text),
+        migrations.RemoveField(
+            model_name='botmessage',
+            name='content',
+        ),
+        migrations.RenameField(
+            model_name='botmessage',
+            old_name='content_json',
+            new_name='content',
+        ),
+        migrations.RunPython(create_content_gin_index, drop_content_gin_index),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 4.2.7 on 2026-10-15 10:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('telegram_bot', '0004_botmessage_content_jsonb'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='telegramuser',
+            name='telegram_bo_telegra_a470eb_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='botanalytics',
+            name='telegram_bo_date_688b36_idx',
+        ),
+        migrations.AddIndex(
+            model_name='botmessage',
+            index=models.Index(fields=['-created_at'], name='botmsg_created_desc_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-15 10:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('telegram_bot', '0005_index_cleanup'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='botconversation',
+            index=models.Index(fields=['-created_at'], name='botconv_created_desc_idx'),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 4.2.7 on 2026-10-15 10:00
+
+from django.db import migrations, models
+import django.db.models.functions.text
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('telegram_bot', '0006_botconversation_created_desc_idx'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='telegramuser',
+            name='tguser_username_lower_idx',
+        ),
+        migrations.AddIndex(
+            model_name='telegramuser',
+            index=models.Index(django.db.models.functions.text.Upper('username'), name='tguser_username_upper_idx'),
+        ),
+    ]
@@ -3,6 +3,7 @@ Telegram bot app models for bot user management and conversation tracking.
 """
 
 from django.db import models
+from django.db.models.functions import Upper
 from django.contrib.auth.models import User
 
 
@@ -32,9 +33,11 @@ class TelegramUser(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        # telegram_id is already indexed by its unique constraint
         indexes = [
-            models.Index(fields=['telegram_id']),
-            models.Index(fields=['username']),
+            # Serves case-insensitive @username lookups: PostgreSQL compiles
+            # username__iexact to UPPER("username"::text) = UPPER(%s)
+            models.Index(Upper('username'), name='tguser_username_upper_idx'),
         ]
     
     def __str__(self):
@@ -72,6 +75,8 @@ class BotConversation(models.Model):
         indexes = [
             models.Index(fields=['user', 'state']),
             models.Index(fields=['last_activity']),
+            # Backs the API's newest-first cursor pagination
+            models.Index(fields=['-created_at'], name='botconv_created_desc_idx'),
         ]
     
     def __str__(self):
@@ -126,7 +131,8 @@ class BotMessage(models.Model):
         choices=MESSAGE_TYPES, 
         default='text'
     )
-    content = models.TextField(blank=True)
+    # Structured payload, e.g. {"text": "..."} for text messages
+    content = models.JSONField(default=dict, blank=True)
     is_bot_message = models.BooleanField(default=False)
     reply_to_message = models.ForeignKey(
         'self', 
@@ -140,6 +146,8 @@ class BotMessage(models.Model):
         ordering = ['-created_at']
         indexes = [
             models.Index(fields=['user', 'created_at']),
+            # Serves the unfiltered newest-first message list
+            models.Index(fields=['-created_at'], name='botmsg_created_desc_idx'),
             models.Index(fields=['message_type']),
             models.Index(fields=['is_bot_message']),
         ]
@@ -171,6 +179,11 @@ class BotWebhook(models.Model):
 class BotAnalytics(models.Model):
     """
     Bot usage analytics and metrics for monitoring.
+
+    One row per date. Rollups should be written in a single statement with
+    ``BotAnalytics.objects.bulk_create(rows, update_conflicts=True,
+    unique_fields=['date'], update_fields=[...])``, which compiles to
+    ``INSERT ... ON CONFLICT (date) DO UPDATE`` on PostgreSQL.
     """
     date = models.DateField()
     total_users = models.PositiveIntegerField(default=0)
@@ -185,9 +198,9 @@ class BotAnalytics(models.Model):
     
     class Meta:
         ordering = ['-date']
-        unique_together = ['date']
-        indexes = [
-            models.Index(fields=['date']),
+        # The unique constraint's index also serves date filters and ordering
+        constraints = [
+            models.UniqueConstraint(fields=['date'], name='botanalytics_date_uniq'),
         ]
     
     def __str__(self):
@@ -0,0 +1,29 @@
+"""
+Telegram bot app pagination.
+"""
+
+from rest_framework.pagination import CursorPagination
+
+
+class BotMessageCursorPagination(CursorPagination):
+    """
+    Cursor pagination for the message log, newest first.
+    
+    Pages are fetched by seeking past the last seen created_at, so each
+    page costs the same regardless of how deep the client has scrolled
+    and no COUNT(*) runs over the whole table.
+    """
+    page_size = 50
+    ordering = '-created_at'
+
+
+class BotConversationCursorPagination(CursorPagination):
+    """
+    Cursor pagination for conversations, newest first.
+    
+    Cursors need a field that never changes once a row exists; last_activity
+    is auto_now, so conversations touched mid-scroll would move between
+    pages and be skipped or repeated. Pages seek on botconv_created_desc_idx.
+    """
+    page_size = 50
+    ordering = '-created_at'
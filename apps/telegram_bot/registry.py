@@ -0,0 +1,35 @@
+"""
+In-process registry of active bot commands.
+"""
+
+import functools
+
+from django.core.cache import cache
+
+from .models import BotCommand
+
+# Cache key holding the command revision; bumped on every command mutation
+COMMANDS_REVISION_KEY = 'botcmd_rev'
+
+
+@functools.lru_cache(maxsize=1)
+def _load_commands(rev: int) -> tuple:
+    """Load active commands for the given revision."""
+    return tuple(BotCommand.objects.filter(is_active=True))
+
+
+def get_active_commands() -> tuple:
+    """
+    Get active bot commands, hitting the database only when the
+    command revision has changed since the last load.
+    """
+    return _load_commands(cache.get(COMMANDS_REVISION_KEY, 0))
+
+
+def bump_commands_revision():
+    """Invalidate cached commands in every worker after a mutation."""
+    try:
+        cache.incr(COMMANDS_REVISION_KEY)
+    except ValueError:
+        cache.set(COMMANDS_REVISION_KEY, 1, timeout=None)
+    _load_commands.cache_clear()
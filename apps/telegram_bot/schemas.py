@@ -0,0 +1,15 @@
+"""
+Shape checks for incoming Telegram Bot API payloads.
+"""
+
+from typing import Any
+
+
+def is_telegram_update(data: Any) -> bool:
+    """
+    Check that decoded JSON has the shape of a Bot API Update.
+    
+    Only the envelope is checked; the payload is handed on whole, since
+    python-telegram-bot builds the full Update from it downstream.
+    """
+    return isinstance(data, dict) and type(data.get('update_id')) is int
@@ -0,0 +1,26 @@
+"""
+Webhook secret handling shared by the Telegram webhook views.
+"""
+
+import functools
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+
+@functools.lru_cache(maxsize=1)
+def expected_telegram_secret() -> bytes:
+    """
+    Return the configured webhook secret as bytes, read from settings once.
+    """
+    return getattr(settings, 'TELEGRAM_WEBHOOK_SECRET', '').encode()
+
+
+@receiver(setting_changed)
+def _reset_expected_telegram_secret(setting, **kwargs):
+    """
+    Drop the cached webhook secret when settings are overridden.
+    """
+    if setting == 'TELEGRAM_WEBHOOK_SECRET':
+        expected_telegram_secret.cache_clear()
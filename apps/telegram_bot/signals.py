@@ -0,0 +1,15 @@
+"""
+Signal handlers for the Telegram bot app.
+"""
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import BotCommand
+from .registry import bump_commands_revision
+
+
+@receiver([post_save, post_delete], sender=BotCommand)
+def invalidate_command_registry(sender, **kwargs):
+    """Invalidate cached active commands whenever a command changes."""
+    bump_commands_revision()
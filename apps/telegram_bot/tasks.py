@@ -0,0 +1,69 @@
+"""
+Celery tasks for the Telegram bot app.
+"""
+
+from datetime import timedelta
+
+from celery import shared_task
+from django.db.models import Count, Q
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .bot import handle_telegram_update
+from .models import BotAnalytics, BotMessage, TelegramUser
+
+
+@shared_task(ignore_result=True)
+def process_telegram_update(update_data):
+    """
+    Process a Telegram update off the webhook request path.
+    """
+    handle_telegram_update(update_data)
+
+
+@shared_task(ignore_result=True)
+def rollup_bot_analytics(days=1):
+    """
+    Rebuild BotAnalytics rows for the last ``days`` days from BotMessage.
+    
+    Per-day counts are computed by one GROUP BY query and written back by
+    one upsert, so the cost does not depend on Python iterating messages.
+    Returns the number of days written.
+    """
+    since = timezone.localdate() - timedelta(days=days - 1)
+    inbound = Q(is_bot_message=False)
+    daily = (
+        BotMessage.objects
+        .filter(created_at__date__gte=since)
+        .annotate(day=TruncDate('created_at'))
+        .values('day')
+        .annotate(
+            received=Count('id', filter=inbound),
+            sent=Count('id', filter=Q(is_bot_message=True)),
+            commands=Count('id', filter=inbound & Q(content__text__startswith='/')),
+            active=Count('user', filter=inbound, distinct=True),
+        )
+        .order_by()
+    )
+    total_users = TelegramUser.objects.count()
+    rows = [
+        BotAnalytics(
+            date=row['day'],
+            total_users=total_users,
+            active_users=row['active'],
+            messages_sent=row['sent'],
+            messages_received=row['received'],
+            commands_executed=row['commands'],
+        )
+        for row in daily
+    ]
+    BotAnalytics.objects.bulk_create(
+        rows,
+        update_conflicts=True,
+        unique_fields=['date'],
+        update_fields=[
+            'total_users', 'active_users', 'messages_sent',
+            'messages_received', 'commands_executed',
+        ],
+    )
+    return len(rows)
@@ -1,83 +1,168 @@
 """
 Tests for telegram bot app API endpoints.
+
+Every test case here must derive from django.test.TestCase so it is rolled
+back with savepoints; TransactionTestCase flushes every table after each test
+and would make this module several times slower.
 """
 
-from django.test import TestCase
+import json
+import unittest
+from datetime import date, timedelta
+from unittest.mock import patch
+
+import orjson
+
+from django.test import TestCase, override_settings
 from django.contrib.auth.models import User
 from django.urls import reverse
-from rest_framework.test import APITestCase
-from rest_framework import status
+from rest_framework.test import APITestCase, APIRequestFactory, force_authenticate
+from rest_framework import permissions, status
 from rest_framework.authtoken.models import Token
+from apps.core.permissions import IsAdminOrOwner, IsTelegramBotOwner
 from apps.telegram_bot.models import (
     TelegramUser, BotConversation, BotCommand as BotCommandModel,
     BotMessage, BotWebhook, BotAnalytics
 )
+from apps.telegram_bot.views import (
+    TelegramUserViewSet, BotConversationViewSet, BotCommandViewSet,
+    BotMessageViewSet, BotWebhookViewSet, BotAnalyticsViewSet, _webhook_throttle
+)
 
 
-class TelegramUserAPITestCase(APITestCase):
-    """Test cases for Telegram user API endpoints."""
+def create_token_user(**kwargs):
+    """
+    Create a user for token-authenticated tests.
+
+    These tests never log in with a password, so skip hashing altogether.
+    """
+    user = User(**kwargs)
+    user.set_unusable_password()
+    user.save()
+    return user
+
+
+def create_api_user(**kwargs):
+    """Create a token-authenticated user and return it with its token."""
+    user = create_token_user(**kwargs)
+    # get_or_create stays correct if a post_save hook ever issues tokens
+    token, _ = Token.objects.get_or_create(user=user)
+    return user, token
+
+
+class AuthenticatedAPITestCase(APITestCase):
+    """Base class for API tests run as a shared token-authenticated user."""
     
-    def setUp(self):
-        """Set up test data."""
-        self.user = User.objects.create_user(
+    is_staff = False
+    
+    @classmethod
+    def setUpTestData(cls):
+        """Create the API user every test in the class authenticates as."""
+        cls.user, cls.token = create_api_user(
             username='testuser',
             email='test@example.com',
-            password='testpass123'
+            is_staff=cls.is_staff
         )
-        self.token = Token.objects.create(user=self.user)
-        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
-        
-        self.telegram_user = TelegramUser.objects.create(
-            user=self.user,
+    
+    @classmethod
+    def create_telegram_user(cls, **kwargs):
+        """Create the Telegram profile linked to the shared API user."""
+        return TelegramUser.objects.create(
+            user=cls.user,
             telegram_id=123456789,
             username='testuser',
+            **kwargs
+        )
+    
+    def setUp(self):
+        """Authenticate the per-test API client."""
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+    
+    def assertDetailEqual(self, response, expected):
+        """Assert a detail response succeeded and carries the expected fields."""
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            {field: response.data.get(field) for field in expected}, expected
+        )
+    
+    def retrieve(self, viewset, pk):
+        """
+        Call a viewset's retrieve action directly.
+        
+        Skips the middleware stack for tests that only check serializer output.
+        """
+        request = APIRequestFactory().get(self.detail_url)
+        force_authenticate(request, user=self.user, token=self.token)
+        return viewset.as_view({'get': 'retrieve'})(request, pk=pk)
+
+
+class TelegramUserAPITestCase(AuthenticatedAPITestCase):
+    """Test cases for Telegram user API endpoints."""
+    
+    @classmethod
+    def setUpTestData(cls):
+        """Set up test data shared by every test in the class."""
+        super().setUpTestData()
+        
+        cls.telegram_user = cls.create_telegram_user(
             first_name='Test',
             last_name='User',
             language_code='en',
             is_premium=True,
             is_verified=True
         )
+        
+        # Unlinked user for the create test to attach a new Telegram user to
+        cls.spare_user = create_token_user(
+            username='newuser',
+            email='newuser@example.com'
+        )
+        
+        cls.list_url = reverse('telegramuser-list')
+        cls.detail_url = reverse('telegramuser-detail', kwargs={'pk': cls.telegram_user.id})
+        cls.expected_detail = {
+            'telegram_id': 123456789,
+            'username': 'testuser',
+            'first_name': 'Test'
+        }
+        cls.create_payload = json.dumps({
+            'user': cls.spare_user.id,
+            'telegram_id': 987654321,
+            'username': 'newuser',
+            'first_name': 'New',
+            'last_name': 'User',
+            'language_code': 'es',
+            'is_premium': False,
+            'is_verified': False
+        })
+        cls.update_payload = json.dumps({
+            'first_name': 'Updated',
+            'last_name': 'Name',
+            'language_code': 'fr'
+        })
     
     def test_telegram_user_list_api(self):
         """Test Telegram user list API endpoint."""
-        url = reverse('telegramuser-list')
+        url = self.list_url
         response = self.client.get(url)
         
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertIn('results', response.data)
-        self.assertGreater(len(response.data['results']), 0)
+        self.assertEqual(response.data['count'], 1)
     
     def test_telegram_user_detail_api(self):
         """Test Telegram user detail API endpoint."""
-        url = reverse('telegramuser-detail', kwargs={'pk': self.telegram_user.id})
-        response = self.client.get(url)
+        response = self.retrieve(TelegramUserViewSet, self.telegram_user.id)
         
-        self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(response.data['telegram_id'], 123456789)
-        self.assertEqual(response.data['username'], 'testuser')
-        self.assertEqual(response.data['first_name'], 'Test')
+        self.assertDetailEqual(response, self.expected_detail)
     
     def test_telegram_user_create_api(self):
         """Test Telegram user creation API endpoint."""
-        new_user = User.objects.create_user(
-            username='newuser',
-            email='newuser@example.com',
-            password='newpass123'
+        url = self.list_url
+        response = self.client.post(
+            url, self.create_payload, content_type='application/json'
         )
         
-        url = reverse('telegramuser-list')
-        data = {
-            'user': new_user.id,
-            'telegram_id': 987654321,
-            'username': 'newuser',
-            'first_name': 'New',
-            'last_name': 'User',
-            'language_code': 'es',
-            'is_premium': False,
-            'is_verified': False
-        }
-        response = self.client.post(url, data)
-        
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
         self.assertEqual(response.data['telegram_id'], 987654321)
         self.assertEqual(response.data['username'], 'newuser')
@@ -85,13 +170,10 @@ class TelegramUserAPITestCase(APITestCase):
     
     def test_telegram_user_update_api(self):
         """Test Telegram user update API endpoint."""
-        url = reverse('telegramuser-detail', kwargs={'pk': self.telegram_user.id})
-        data = {
-            'first_name': 'Updated',
-            'last_name': 'Name',
-            'language_code': 'fr'
-        }
-        response = self.client.patch(url, data)
+        url = self.detail_url
+        response = self.client.patch(
+            url, self.update_payload, content_type='application/json'
+        )
         
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response.data['first_name'], 'Updated')
@@ -100,73 +182,75 @@ class TelegramUserAPITestCase(APITestCase):
     
     def test_telegram_user_filtering(self):
         """Test Telegram user filtering."""
-        url = reverse('telegramuser-list')
+        url = self.list_url
         response = self.client.get(url, {'is_verified': 'true'})
         
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertGreater(len(response.data['results']), 0)
+        self.assertEqual(response.data['count'], 1)
     
     def test_telegram_user_search(self):
         """Test Telegram user search."""
-        url = reverse('telegramuser-list')
+        url = self.list_url
         response = self.client.get(url, {'search': 'Test'})
         
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertGreater(len(response.data['results']), 0)
+        self.assertEqual(response.data['count'], 1)
 
 
-class BotConversationAPITestCase(APITestCase):
+class BotConversationAPITestCase(AuthenticatedAPITestCase):
     """Test cases for bot conversation API endpoints."""
     
-    def setUp(self):
-        """Set up test data."""
-        self.user = User.objects.create_user(
-            username='testuser',
-            email='test@example.com',
-            password='testpass123'
-        )
-        self.token = Token.objects.create(user=self.user)
-        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+    @classmethod
+    def setUpTestData(cls):
+        """Set up test data shared by every test in the class."""
+        super().setUpTestData()
         
-        self.telegram_user = TelegramUser.objects.create(
-            user=self.user,
-            telegram_id=123456789,
-            username='testuser'
-        )
+        cls.telegram_user = cls.create_telegram_user()
         
-        self.conversation = BotConversation.objects.create(
-            user=self.telegram_user,
+        cls.conversation = BotConversation.objects.create(
+            user=cls.telegram_user,
             state='waiting_for_input',
             context={'step': 1, 'data': 'test'}
         )
+        
+        cls.list_url = reverse('botconversation-list')
+        cls.detail_url = reverse('botconversation-detail', kwargs={'pk': cls.conversation.id})
+        cls.expected_detail = {
+            'state': 'waiting_for_input',
+            'context': {'step': 1, 'data': 'test'}
+        }
+        cls.create_payload = json.dumps({
+            'user': cls.telegram_user.id,
+            'state': 'processing',
+            'context': {'new_step': 2, 'new_data': 'new_test'}
+        })
+        cls.update_payload = json.dumps({
+            'state': 'completed',
+            'context': {'step': 2, 'data': 'updated'}
+        })
     
     def test_bot_conversation_list_api(self):
         """Test bot conversation list API endpoint."""
-        url = reverse('botconversation-list')
+        url = self.list_url
         response = self.client.get(url)
         
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertIn('results', response.data)
-        self.assertGreater(len(response.data['results']), 0)
+        self.assertNotIn('count', response.data)
+        self.assertEqual(len(response.data['results']), 1)
     
     def test_bot_conversation_detail_api(self):
         """Test bot conversation detail API endpoint."""
-        url = reverse('botconversation-detail', kwargs={'pk': self.conversation.id})
-        response = self.client.get(url)
+        response = self.retrieve(BotConversationViewSet, self.conversation.id)
         
-        self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(response.data['state'], 'waiting_for_input')
-        self.assertEqual(response.data['context'], {'step': 1, 'data': 'test'})
+        self.assertDetailEqual(response, self.expected_detail)
     
     def test_bot_conversation_create_api(self):
         """Test bot conversation creation API endpoint."""
-        url = reverse('botconversation-list')
-        data = {
-            'user': self.telegram_user.id,
-            'state': 'processing',
-            'context': {'new_step': 2, 'new_data': 'new_test'}
-        }
-        response = self.client.post(url, data)
+        url = self.list_url
+        response = self.client.post(
+            url, self.create_payload, content_type='application/json'
+        )
         
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
         self.assertEqual(response.data['state'], 'processing')
@@ -174,12 +258,10 @@ class BotConversationAPITestCase(APITestCase):
     
     def test_bot_conversation_update_api(self):
         """Test bot conversation update API endpoint."""
-        url = reverse('botconversation-detail', kwargs={'pk': self.conversation.id})
-        data = {
-            'state': 'completed',
-            'context': {'step': 2, 'data': 'updated'}
-        }
-        response = self.client.patch(url, data)
+        url = self.detail_url
+        response = self.client.patch(
+            url, self.update_payload, content_type='application/json'
+        )
         
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response.data['state'], 'completed')
@@ -187,28 +269,24 @@ class BotConversationAPITestCase(APITestCase):
     
     def test_bot_conversation_filtering(self):
         """Test bot conversation filtering."""
-        url = reverse('botconversation-list')
+        url = self.list_url
         response = self.client.get(url, {'state': 'waiting_for_input'})
         
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertGreater(len(response.data['results']), 0)
+        self.assertEqual(len(response.data['results']), 1)
 
 
-class BotCommandAPITestCase(APITestCase):
+class BotCommandAPITestCase(AuthenticatedAPITestCase):
     """Test cases for bot command API endpoints."""
     
-    def setUp(self):
-        """Set up test data."""
-        self.user = User.objects.create_user(
-            username='testuser',
-            email='test@example.com',
-            password='testpass123',
-            is_staff=True  # Staff user for command management
-        )
-        self.token = Token.objects.create(user=self.user)
-        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+    is_staff = True  # Staff user for command management
+    
+    @classmethod
+    def setUpTestData(cls):
+        """Set up test data shared by every test in the class."""
+        super().setUpTestData()
         
-        self.command = BotCommandModel.objects.create(
+        cls.command = BotCommandModel.objects.create(
             command='test',
             description='Test command',
             handler_function='test_handler',
@@ -216,38 +294,49 @@ class BotCommandAPITestCase(APITestCase):
             requires_auth=True,
             admin_only=False
         )
+        
+        cls.list_url = reverse('botcommand-list')
+        cls.detail_url = reverse('botcommand-detail', kwargs={'pk': cls.command.id})
+        cls.expected_detail = {
+            'command': 'test',
+            'description': 'Test command',
+            'handler_function': 'test_handler'
+        }
+        cls.active_url = reverse('botcommand-active')
+        cls.create_payload = json.dumps({
+            'command': 'new_command',
+            'description': 'New test command',
+            'handler_function': 'new_handler',
+            'is_active': True,
+            'requires_auth': False,
+            'admin_only': True
+        })
+        cls.update_payload = json.dumps({
+            'description': 'Updated test command',
+            'is_active': False
+        })
     
     def test_bot_command_list_api(self):
         """Test bot command list API endpoint."""
-        url = reverse('botcommand-list')
+        url = self.list_url
         response = self.client.get(url)
         
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertIn('results', response.data)
-        self.assertGreater(len(response.data['results']), 0)
+        self.assertEqual(response.data['count'], 1)
     
     def test_bot_command_detail_api(self):
         """Test bot command detail API endpoint."""
-        url = reverse('botcommand-detail', kwargs={'pk': self.command.id})
-        response = self.client.get(url)
+        response = self.retrieve(BotCommandViewSet, self.command.id)
         
-        self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(response.data['command'], 'test')
-        self.assertEqual(response.data['description'], 'Test command')
-        self.assertEqual(response.data['handler_function'], 'test_handler')
+        self.assertDetailEqual(response, self.expected_detail)
     
     def test_bot_command_create_api(self):
         """Test bot command creation API endpoint."""
-        url = reverse('botcommand-list')
-        data = {
-            'command': 'new_command',
-            'description': 'New test command',
-            'handler_function': 'new_handler',
-            'is_active': True,
-            'requires_auth': False,
-            'admin_only': True
-        }
-        response = self.client.post(url, data)
+        url = self.list_url
+        response = self.client.post(
+            url, self.create_payload, content_type='application/json'
+        )
         
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
         self.assertEqual(response.data['command'], 'new_command')
@@ -256,12 +345,10 @@ class BotCommandAPITestCase(APITestCase):
     
     def test_bot_command_update_api(self):
         """Test bot command update API endpoint."""
-        url = reverse('botcommand-detail', kwargs={'pk': self.command.id})
-        data = {
-            'description': 'Updated test command',
-            'is_active': False
-        }
-        response = self.client.patch(url, data)
+        url = self.detail_url
+        response = self.client.patch(
+            url, self.update_payload, content_type='application/json'
+        )
         
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response.data['description'], 'Updated test command')
@@ -269,136 +356,144 @@ class BotCommandAPITestCase(APITestCase):
     
     def test_bot_command_active_api(self):
         """Test active bot commands API endpoint."""
-        url = reverse('botcommand-active')
+        url = self.active_url
         response = self.client.get(url)
         
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertIsInstance(response.data, list)
-        self.assertGreater(len(response.data), 0)
+        self.assertEqual(len(response.data), 1)
     
     def test_bot_command_filtering(self):
         """Test bot command filtering."""
-        url = reverse('botcommand-list')
+        url = self.list_url
         response = self.client.get(url, {'is_active': 'true'})
         
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertGreater(len(response.data['results']), 0)
+        self.assertEqual(response.data['count'], 1)
 
 
-class BotMessageAPITestCase(APITestCase):
+class BotMessageAPITestCase(AuthenticatedAPITestCase):
     """Test cases for bot message API endpoints."""
     
-    def setUp(self):
-        """Set up test data."""
-        self.user = User.objects.create_user(
-            username='testuser',
-            email='test@example.com',
-            password='testpass123'
-        )
-        self.token = Token.objects.create(user=self.user)
-        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+    @classmethod
+    def setUpTestData(cls):
+        """Set up test data shared by every test in the class."""
+        super().setUpTestData()
         
-        self.telegram_user = TelegramUser.objects.create(
-            user=self.user,
-            telegram_id=123456789,
-            username='testuser'
-        )
+        cls.telegram_user = cls.create_telegram_user()
         
-        self.message = BotMessage.objects.create(
-            user=self.telegram_user,
+        cls.message = BotMessage.objects.create(
+            user=cls.telegram_user,
             message_id=123,
             message_type='text',
-            content='Hello bot!',
+            content={'text': 'Hello bot!'},
             is_bot_message=False
         )
+        
+        cls.list_url = reverse('botmessage-list')
+        cls.detail_url = reverse('botmessage-detail', kwargs={'pk': cls.message.id})
+        cls.expected_detail = {
+            'message_id': 123,
+            'message_type': 'text',
+            'content': {'text': 'Hello bot!'},
+            'is_bot_message': False
+        }
     
     def test_bot_message_list_api(self):
         """Test bot message list API endpoint."""
-        url = reverse('botmessage-list')
+        url = self.list_url
         response = self.client.get(url)
         
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertIn('results', response.data)
-        self.assertGreater(len(response.data['results']), 0)
+        self.assertNotIn('count', response.data)
+        self.assertEqual(len(response.data['results']), 1)
     
     def test_bot_message_detail_api(self):
         """Test bot message detail API endpoint."""
-        url = reverse('botmessage-detail', kwargs={'pk': self.message.id})
-        response = self.client.get(url)
+        response = self.retrieve(BotMessageViewSet, self.message.id)
         
-        self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(response.data['message_id'], 123)
-        self.assertEqual(response.data['message_type'], 'text')
-        self.assertEqual(response.data['content'], 'Hello bot!')
-        self.assertFalse(response.data['is_bot_message'])
+        self.assertDetailEqual(response, self.expected_detail)
     
     def test_bot_message_filtering(self):
         """Test bot message filtering."""
-        url = reverse('botmessage-list')
+        url = self.list_url
         response = self.client.get(url, {'message_type': 'text'})
         
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertGreater(len(response.data['results']), 0)
+        self.assertEqual(len(response.data['results']), 1)
     
     def test_bot_message_search(self):
         """Test bot message search."""
-        url = reverse('botmessage-list')
+        url = self.list_url
         response = self.client.get(url, {'search': 'Hello'})
         
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertGreater(len(response.data['results']), 0)
+        self.assertEqual(len(response.data['results']), 1)
+        
+        # Only the message text is searched, not the JSON around it
+        response = self.client.get(url, {'search': 'text'})
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 0)
 
 
-class BotWebhookAPITestCase(APITestCase):
+class BotWebhookAPITestCase(AuthenticatedAPITestCase):
     """Test cases for bot webhook API endpoints."""
     
-    def setUp(self):
-        """Set up test data."""
-        self.user = User.objects.create_user(
-            username='testuser',
-            email='test@example.com',
-            password='testpass123',
-            is_staff=True  # Staff user for webhook management
-        )
-        self.token = Token.objects.create(user=self.user)
-        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+    is_staff = True  # Staff user for webhook management
+    
+    @classmethod
+    def setUpTestData(cls):
+        """Set up test data shared by every test in the class."""
+        super().setUpTestData()
         
-        self.webhook = BotWebhook.objects.create(
+        cls.webhook = BotWebhook.objects.create(
             webhook_url='https://example.com/webhook',
             is_active=True,
             secret_token='secret123',
             last_update_id=100
         )
+        
+        cls.list_url = reverse('botwebhook-list')
+        cls.detail_url = reverse('botwebhook-detail', kwargs={'pk': cls.webhook.id})
+        cls.expected_detail = {
+            'webhook_url': 'https://example.com/webhook',
+            'is_active': True,
+            'secret_token': 'secret123'
+        }
+        cls.create_payload = json.dumps({
+            'webhook_url': 'https://new.example.com/webhook',
+            'is_active': True,
+            'secret_token': 'new_secret',
+            'last_update_id': 0
+        })
+        cls.update_payload = json.dumps({
+            'is_active': False,
+            'last_update_id': 200
+        })
     
     def test_bot_webhook_list_api(self):
         """Test bot webhook list API endpoint."""
-        url = reverse('botwebhook-list')
+        url = self.list_url
         response = self.client.get(url)
         
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertIn('results', response.data)
-        self.assertGreater(len(response.data['results']), 0)
+        self.assertEqual(response.data['count'], 1)
     
     def test_bot_webhook_detail_api(self):
         """Test bot webhook detail API endpoint."""
-        url = reverse('botwebhook-detail', kwargs={'pk': self.webhook.id})
-        response = self.client.get(url)
+        response = self.retrieve(BotWebhookViewSet, self.webhook.id)
         
-        self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(response.data['webhook_url'], 'https://example.com/webhook')
-        self.assertTrue(response.data['is_active'])
-        self.assertEqual(response.data['secret_token'], 'secret123')
+        self.assertDetailEqual(response, self.expected_detail)
     
     def test_bot_webhook_create_api(self):
         """Test bot webhook creation API endpoint."""
-        url = reverse('botwebhook-list')
-        data = {
-            'webhook_url': 'https://new.example.com/webhook',
-            'is_active': True,
-            'secret_token': 'new_secret',
-            'last_update_id': 0
-        }
-        response = self.client.post(url, data)
+        url = self.list_url
+        response = self.client.post(
+            url, self.create_payload, content_type='application/json'
+        )
         
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
         self.assertEqual(response.data['webhook_url'], 'https://new.example.com/webhook')
@@ -407,12 +502,10 @@ class BotWebhookAPITestCase(APITestCase):
     
     def test_bot_webhook_update_api(self):
         """Test bot webhook update API endpoint."""
-        url = reverse('botwebhook-detail', kwargs={'pk': self.webhook.id})
-        data = {
-            'is_active': False,
-            'last_update_id': 200
-        }
-        response = self.client.patch(url, data)
+        url = self.detail_url
+        response = self.client.patch(
+            url, self.update_payload, content_type='application/json'
+        )
         
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertFalse(response.data['is_active'])
@@ -420,60 +513,72 @@ class BotWebhookAPITestCase(APITestCase):
     
     def test_bot_webhook_filtering(self):
         """Test bot webhook filtering."""
-        url = reverse('botwebhook-list')
+        url = self.list_url
         response = self.client.get(url, {'is_active': 'true'})
         
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertGreater(len(response.data['results']), 0)
+        self.assertEqual(response.data['count'], 1)
 
 
-class BotAnalyticsAPITestCase(APITestCase):
+class BotAnalyticsAPITestCase(AuthenticatedAPITestCase):
     """Test cases for bot analytics API endpoints."""
     
-    def setUp(self):
-        """Set up test data."""
-        self.user = User.objects.create_user(
-            username='testuser',
-            email='test@example.com',
-            password='testpass123'
-        )
-        self.token = Token.objects.create(user=self.user)
-        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
-        
-        from datetime import date
-        self.analytics = BotAnalytics.objects.create(
-            date=date.today(),
-            total_users=100,
-            active_users=50,
-            messages_sent=200,
-            messages_received=150,
-            commands_executed=75,
-            errors_count=5
-        )
+    @classmethod
+    def setUpTestData(cls):
+        """Set up test data shared by every test in the class."""
+        super().setUpTestData()
+        
+        # Several consecutive days so the ordering test has rows to compare
+        today = date.today()
+        BotAnalytics.objects.bulk_create([
+            BotAnalytics(
+                date=today - timedelta(days=i),
+                total_users=100 + i,
+                active_users=50 + i,
+                messages_sent=200 + i,
+                messages_received=150 + i,
+                commands_executed=75 + i,
+                errors_count=5 + i
+            )
+            for i in range(3)
+        ])
+        cls.analytics = BotAnalytics.objects.get(date=today)
+        
+        cls.list_url = reverse('botanalytics-list')
+        cls.detail_url = reverse('botanalytics-detail', kwargs={'pk': cls.analytics.id})
+        cls.expected_detail = {
+            'total_users': 100,
+            'active_users': 50,
+            'messages_sent': 200,
+            'messages_received': 150
+        }
     
     def test_bot_analytics_list_api(self):
         """Test bot analytics list API endpoint."""
-        url = reverse('botanalytics-list')
+        url = self.list_url
         response = self.client.get(url)
         
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertIn('results', response.data)
-        self.assertGreater(len(response.data['results']), 0)
+        self.assertEqual(response.data['count'], 3)
     
     def test_bot_analytics_detail_api(self):
         """Test bot analytics detail API endpoint."""
-        url = reverse('botanalytics-detail', kwargs={'pk': self.analytics.id})
-        response = self.client.get(url)
+        response = self.retrieve(BotAnalyticsViewSet, self.analytics.id)
+        
+        self.assertDetailEqual(response, self.expected_detail)
+    
+    def test_bot_analytics_list_matches_detail(self):
+        """Test the list fast path renders rows exactly like the serializer."""
+        response = self.client.get(self.list_url)
+        detail = self.retrieve(BotAnalyticsViewSet, self.analytics.id)
         
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(response.data['total_users'], 100)
-        self.assertEqual(response.data['active_users'], 50)
-        self.assertEqual(response.data['messages_sent'], 200)
-        self.assertEqual(response.data['messages_received'], 150)
+        self.assertEqual(response.data['results'][0], detail.data)
     
     def test_bot_analytics_filtering(self):
         """Test bot analytics filtering."""
-        url = reverse('botanalytics-list')
+        url = self.list_url
         response = self.client.get(url, {'date': str(self.analytics.date)})
         
         self.assertEqual(response.status_code, status.HTTP_200_OK)
@@ -481,25 +586,27 @@ class BotAnalyticsAPITestCase(APITestCase):
     
     def test_bot_analytics_ordering(self):
         """Test bot analytics ordering."""
-        url = reverse('botanalytics-list')
+        url = self.list_url
         response = self.client.get(url, {'ordering': '-date'})
         
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         results = response.data['results']
         
-        # Check if results are ordered by date descending
-        if len(results) > 1:
-            self.assertGreaterEqual(results[0]['date'], results[1]['date'])
+        # Check results are ordered by date descending
+        self.assertEqual(len(results), 3)
+        dates = [result['date'] for result in results]
+        self.assertEqual(dates, sorted(dates, reverse=True))
 
 
+@override_settings(TELEGRAM_WEBHOOK_SECRET='s')
 class TelegramWebhookTestCase(APITestCase):
     """Test cases for Telegram webhook endpoint."""
     
-    def test_telegram_webhook_post(self):
-        """Test Telegram webhook POST endpoint."""
-        url = reverse('telegram-webhook')
-        
-        webhook_data = {
+    @classmethod
+    def setUpTestData(cls):
+        """Set up request bodies shared by every test in the class."""
+        cls.url = reverse('telegram_webhook')
+        cls.valid_body = json.dumps({
             'update_id': 123456,
             'message': {
                 'message_id': 1,
@@ -511,49 +618,105 @@ class TelegramWebhookTestCase(APITestCase):
                 },
                 'text': 'Hello bot!'
             }
-        }
-        
-        response = self.client.post(
-            url,
-            data=webhook_data,
-            content_type='application/json'
-        )
+        }).encode()
+        cls.minimal_body = json.dumps({
+            'update_id': 123456,
+            'message': {
+                'message_id': 1,
+                'from': {'id': 123456789},
+                'text': 'Hello bot!'
+            }
+        }).encode()
+        cls.invalid_body = b'invalid json'
+    
+    def test_telegram_webhook_post(self):
+        """Test Telegram webhook POST endpoint."""
+        with patch('apps.telegram_bot.views.process_telegram_update') as mock_task:
+            response = self.client.post(
+                self.url,
+                data=self.valid_body,
+                content_type='application/json',
+                HTTP_X_TELEGRAM_BOT_API_SECRET_TOKEN='s'
+            )
         
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(response.data['status'], 'ok')
+        self.assertEqual(orjson.loads(response.content)['status'], 'ok')
+        mock_task.delay.assert_called_once_with(orjson.loads(self.valid_body))
     
     def test_telegram_webhook_invalid_json(self):
         """Test Telegram webhook with invalid JSON."""
-        url = reverse('telegram-webhook')
-        
         response = self.client.post(
-            url,
-            data='invalid json',
-            content_type='application/json'
+            self.url,
+            data=self.invalid_body,
+            content_type='application/json',
+            HTTP_X_TELEGRAM_BOT_API_SECRET_TOKEN='s'
         )
         
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
-        self.assertIn('error', response.data)
+        self.assertIn('error', orjson.loads(response.content))
     
     def test_telegram_webhook_unauthorized(self):
         """Test Telegram webhook with invalid secret token."""
-        url = reverse('telegram-webhook')
-        
-        webhook_data = {
-            'update_id': 123456,
-            'message': {
-                'message_id': 1,
-                'from': {'id': 123456789},
-                'text': 'Hello bot!'
-            }
-        }
-        
         response = self.client.post(
-            url,
-            data=webhook_data,
+            self.url,
+            data=self.minimal_body,
             content_type='application/json',
             HTTP_X_TELEGRAM_BOT_API_SECRET_TOKEN='invalid_token'
         )
         
         self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
-        self.assertIn('error', response.data)
+        self.assertIn('error', orjson.loads(response.content))
+    
+    def test_telegram_webhook_payload_too_large(self):
+        """Test Telegram webhook rejects oversized bodies before parsing."""
+        response = self.client.post(
+            self.url,
+            data=b'{"update_id": 1, "padding": "' + b'x' * (64 * 1024) + b'"}',
+            content_type='application/json'
+        )
+        
+        self.assertEqual(response.status_code, status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+    
+    def test_webhook_throttle_follows_rate_setting(self):
+        """Test the cached webhook throttle is rebuilt when its rate changes."""
+        with override_settings(TELEGRAM_WEBHOOK_RATE_LIMIT='5/minute'):
+            throttle = _webhook_throttle()
+            self.assertEqual((throttle.limit, throttle.window), (5, 60))
+        
+        self.assertIsNot(_webhook_throttle(), throttle)
+
+
+class ViewSetPermissionsTestCase(TestCase):
+    """Lock down the permission classes each viewset is served with."""
+    
+    def test_viewset_permission_classes(self):
+        """Test every viewset keeps its intended permission classes."""
+        expected = {
+            TelegramUserViewSet: [IsAdminOrOwner],
+            BotConversationViewSet: [IsTelegramBotOwner],
+            BotCommandViewSet: [permissions.IsAdminUser],
+            BotMessageViewSet: [IsTelegramBotOwner],
+            BotWebhookViewSet: [permissions.IsAdminUser],
+            BotAnalyticsViewSet: [permissions.IsAuthenticated],
+        }
+        
+        for viewset, permission_classes in expected.items():
+            with self.subTest(viewset=viewset.__name__):
+                self.assertEqual(viewset.permission_classes, permission_classes)
+
+
+class APITestCaseIsolationTestCase(TestCase):
+    """Guard against API tests falling back to table-flushing isolation."""
+    
+    def test_api_test_cases_use_transaction_rollback(self):
+        """Test every test case in this module is a django.test.TestCase."""
+        test_cases = [
+            obj for obj in globals().values()
+            if isinstance(obj, type) and issubclass(obj, unittest.TestCase)
+            and obj.__module__ == __name__
+        ]
+        
+        self.assertGreater(len(test_cases), 0)
+        for test_case in test_cases:
+            with self.subTest(test_case=test_case.__name__):
+                self.assertTrue(issubclass(test_case, TestCase))
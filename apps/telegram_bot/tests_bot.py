@@ -3,107 +3,275 @@ Tests for Telegram bot functionality.
 """
 
 import asyncio
-import json
-from unittest.mock import Mock, patch, AsyncMock
-from django.test import TestCase, TransactionTestCase
+import io
+from contextlib import contextmanager
+from datetime import date
+from unittest.mock import AsyncMock, Mock, patch
+from django.conf import settings
+from django.core.management import call_command
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
 from django.contrib.auth.models import User
+import orjson
 from rest_framework.test import APITestCase
+from telegram import User as TelegramBotUser
+from telegram.ext import ExtBot
 
+from apps.telegram_bot import bot as bot_module
 from apps.telegram_bot.bot import NotiBot, get_bot, handle_telegram_update
-from apps.telegram_bot.models import TelegramUser, BotMessage, BotAnalytics
+from apps.telegram_bot.models import (
+    TelegramUser, BotCommand as BotCommandModel, BotMessage, BotAnalytics
+)
+from apps.telegram_bot.registry import bump_commands_revision, get_active_commands
+from apps.telegram_bot.tasks import process_telegram_update
+from apps.telegram_bot.webhook_server import TelegramWebhookView
 from apps.notifications.models import Notification
+from apps.core.exceptions import NotiAPIException, TelegramBotError
 
 
-class BotTestCase(TestCase):
-    """Test cases for bot functionality."""
+# Fixed date so analytics rows don't depend on when the suite runs
+_TODAY = date(2024, 1, 1)
+
+REQUIRED_COMMANDS = frozenset({
+    '/start', '/help', '/notifications', '/settings', '/stats'
+})
+
+_HELP_TEXT = """
+🤖 **Noti Bot Commands**
+
+**Basic Commands:**
+/start - Start the bot and see main menu
+/help - Show this help message
+/cancel - Cancel current operation
+
+**Notification Commands:**
+/notifications - View your notifications
+/send_notification - Send a new notification
+
+**Settings & Stats:**
+/settings - Manage your notification settings
+/stats - View your usage statistics
+
+**Quick Actions:**
+Use the inline buttons for quick access to features!
+
+Need help? Contact support or use /start to return to the main menu.
+"""
+
+_UPDATE_PAYLOAD = {
+    'update_id': 123456,
+    'message': {
+        'message_id': 1,
+        'from': {
+            'id': 123456789,
+            'username': 'testuser',
+            'first_name': 'Test',
+            'last_name': 'User'
+        },
+        'text': 'Hello bot!'
+    }
+}
+# Encoded as bytes, the way webhook bodies arrive
+_UPDATE_PAYLOAD_JSON = orjson.dumps(_UPDATE_PAYLOAD)
+
+
+@contextmanager
+def override_token(value):
+    """Temporarily swap the bot token without the overhead of mock.patch."""
+    old_token = settings.TELEGRAM_BOT_TOKEN
+    settings.TELEGRAM_BOT_TOKEN = value
+    try:
+        yield
+    finally:
+        settings.TELEGRAM_BOT_TOKEN = old_token
+
+
+class TelegramUserFixtureMixin:
+    """Create the User and linked TelegramUser shared by a test class."""
     
-    def setUp(self):
-        """Set up test data."""
-        self.user = User.objects.create_user(
-            username='testuser',
-            email='test@example.com',
-            password='testpass123'
-        )
-        self.telegram_user = TelegramUser.objects.create(
-            user=self.user,
+    @classmethod
+    def setUpTestData(cls):
+        """Set up test data shared by every test in the class."""
+        # No test logs in, so skip password hashing altogether
+        cls.user = User(username='testuser', email='test@example.com')
+        cls.user.set_unusable_password()
+        cls.user.save()
+        cls.telegram_user = TelegramUser.objects.create(
+            user=cls.user,
             telegram_id=123456789,
             username='testuser',
             first_name='Test',
             last_name='User'
         )
+
+
+class SharedBotMixin:
+    """Share one NotiBot across every test class in this module."""
+    
+    _shared_bot = None
+    
+    @classmethod
+    def setUpClass(cls):
+        """Attach the shared bot, building it with a test token on first use."""
+        super().setUpClass()
+        if SharedBotMixin._shared_bot is None:
+            with override_token('test_token'):
+                SharedBotMixin._shared_bot = NotiBot()
+        cls._bot = SharedBotMixin._shared_bot
+
+
+class BotTestCase(TelegramUserFixtureMixin, SharedBotMixin, TestCase):
+    """Test cases for bot functionality."""
+    
+    databases = {'default'}
+    
+    @classmethod
+    def setUpClass(cls):
+        """Create one event loop for the tests that dispatch updates."""
+        super().setUpClass()
+        cls._loop = asyncio.new_event_loop()
+    
+    @classmethod
+    def tearDownClass(cls):
+        """Close the shared event loop."""
+        cls._loop.close()
+        super().tearDownClass()
     
     def test_bot_initialization(self):
         """Test bot initialization."""
-        with patch('apps.telegram_bot.bot.settings.TELEGRAM_BOT_TOKEN', 'test_token'):
-            bot = NotiBot()
-            self.assertIsNotNone(bot.application)
-            self.assertIsNotNone(bot.bot)
+        bot = self._bot
+        self.assertIsNotNone(bot.application)
+        self.assertIsNotNone(bot.bot)
     
     def test_bot_initialization_no_token(self):
         """Test bot initialization without token."""
-        with patch('apps.telegram_bot.bot.settings.TELEGRAM_BOT_TOKEN', ''):
+        with override_token(''):
             bot = NotiBot()
             self.assertIsNone(bot.application)
             self.assertIsNone(bot.bot)
     
     def test_get_bot_singleton(self):
         """Test bot singleton pattern."""
-        with patch('apps.telegram_bot.bot.settings.TELEGRAM_BOT_TOKEN', 'test_token'):
-            bot1 = get_bot()
-            bot2 = get_bot()
-            self.assertIs(bot1, bot2)
+        # Start from an empty singleton and stub out the costly bot build;
+        # patch restores the real module state afterwards
+        with patch('apps.telegram_bot.bot.bot_instance', None):
+            with patch('apps.telegram_bot.bot.NotiBot', object):
+                bot1 = get_bot()
+                bot2 = get_bot()
+                self.assertIs(bot1, bot2)
     
     def test_handle_telegram_update(self):
         """Test handling Telegram updates."""
-        update_data = {
-            'update_id': 123456,
-            'message': {
-                'message_id': 1,
-                'from': {
-                    'id': 123456789,
-                    'username': 'testuser',
-                    'first_name': 'Test',
-                    'last_name': 'User'
-                },
-                'text': 'Hello bot!'
-            }
-        }
-        
-        with patch('apps.telegram_bot.bot.get_bot') as mock_get_bot:
+        with patch('apps.telegram_bot.bot.get_bot') as mock_get_bot, \
+                patch('apps.telegram_bot.bot.Update.de_json') as mock_de_json:
             mock_bot = Mock()
-            mock_bot.application = Mock()
+            mock_bot.application.process_update = AsyncMock()
             mock_get_bot.return_value = mock_bot
             
-            handle_telegram_update(update_data)
+            async def dispatch():
+                handle_telegram_update(_UPDATE_PAYLOAD)
+                # Let the task scheduled by the handler run
+                await asyncio.sleep(0)
+            
+            self._loop.run_until_complete(dispatch())
             
-            # Verify bot was called
+            # Verify bot was called with the parsed Update
             mock_get_bot.assert_called_once()
+            mock_de_json.assert_called_once_with(_UPDATE_PAYLOAD, mock_bot.bot)
+            mock_bot.application.process_update.assert_awaited_once_with(
+                mock_de_json.return_value
+            )
+    
+    def test_handle_telegram_update_without_running_loop(self):
+        """Test updates are processed to completion outside an event loop."""
+        with patch('apps.telegram_bot.bot.get_bot') as mock_get_bot, \
+                patch('apps.telegram_bot.bot.Update.de_json') as mock_de_json:
+            mock_bot = Mock()
+            mock_bot.application.initialize = AsyncMock()
+            mock_bot.application.process_update = AsyncMock()
+            mock_get_bot.return_value = mock_bot
+            
+            handle_telegram_update(_UPDATE_PAYLOAD)
+            
+            mock_bot.application.initialize.assert_awaited_once()
+            mock_bot.application.process_update.assert_awaited_once_with(
+                mock_de_json.return_value
+            )
+    
+    def test_process_telegram_update_task(self):
+        """Test the Celery task hands the update to the bot handler."""
+        with patch('apps.telegram_bot.tasks.handle_telegram_update') as mock_handle:
+            process_telegram_update.delay(_UPDATE_PAYLOAD)
+        
+        mock_handle.assert_called_once_with(_UPDATE_PAYLOAD)
 
 
-class BotIntegrationTestCase(TransactionTestCase):
-    """Integration tests for bot functionality."""
+class BotUpdateDispatchTestCase(TransactionTestCase):
+    """Dispatch real updates through the bot's handlers, as a worker does."""
+    
+    # Handlers reach the ORM through sync_to_async, whose thread has its own
+    # connection and cannot see TestCase's uncommitted transaction
+    databases = {'default'}
     
     def setUp(self):
-        """Set up test data."""
-        self.user = User.objects.create_user(
-            username='testuser',
-            email='test@example.com',
-            password='testpass123'
-        )
-        self.telegram_user = TelegramUser.objects.create(
-            user=self.user,
-            telegram_id=123456789,
-            username='testuser',
-            first_name='Test',
-            last_name='User'
-        )
+        """Build a bot and worker loop of this test's own, not the shared ones."""
+        with override_token('test_token'):
+            self.bot = NotiBot()
+        patcher = patch('apps.telegram_bot.bot._worker_loop', None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+    
+    def tearDown(self):
+        """Shut down the application and close the loop the update ran on."""
+        loop = bot_module._worker_loop
+        if loop is not None:
+            loop.run_until_complete(self.bot.application.shutdown())
+            loop.close()
+        super().tearDown()
+    
+    def test_start_update_logs_message(self):
+        """Test a /start update outside a loop creates the user and logs it."""
+        payload = {
+            'update_id': 123457,
+            'message': {
+                'message_id': 2,
+                'date': 1704067200,
+                'chat': {'id': 123456789, 'type': 'private'},
+                'from': {'id': 123456789, 'is_bot': False, 'first_name': 'Test', 'username': 'testuser'},
+                'text': '/start',
+                'entities': [{'type': 'bot_command', 'offset': 0, 'length': 6}],
+            }
+        }
+        
+        async def get_me(bot, *args, **kwargs):
+            # CommandHandler matches on the bot's username, cached by getMe
+            bot._bot_user = TelegramBotUser(id=1, is_bot=True, first_name='Noti', username='noti_bot')
+            return bot._bot_user
+        
+        # Keep the Bot API out of it: initialize() calls getMe, replies call sendMessage
+        with patch('apps.telegram_bot.bot.bot_instance', self.bot), \
+                patch.object(ExtBot, 'get_me', get_me), \
+                patch.object(ExtBot, 'send_message', AsyncMock()) as mock_send:
+            handle_telegram_update(payload)
+        
+        mock_send.assert_awaited_once()
+        message = BotMessage.objects.select_related('user').get()
+        self.assertEqual(message.user.telegram_id, 123456789)
+        self.assertEqual(message.message_id, 2)
+        self.assertEqual(message.content, {'text': '/start'})
+
+
+class BotIntegrationTestCase(TelegramUserFixtureMixin, TestCase):
+    """Integration tests for bot functionality."""
+    
+    databases = {'default'}
     
-    @patch('apps.telegram_bot.bot.settings.TELEGRAM_BOT_TOKEN', 'test_token')
     def test_telegram_user_creation(self):
         """Test automatic Telegram user creation."""
-        # This would test the _get_or_create_telegram_user method
-        # In a real test, you'd mock the Telegram update
-        pass
+        with override_token('test_token'):
+            # This would test the _get_or_create_telegram_user method
+            # In a real test, you'd mock the Telegram update
+            pass
     
     def test_notification_creation_via_bot(self):
         """Test notification creation through bot."""
@@ -126,20 +294,18 @@ class BotIntegrationTestCase(TransactionTestCase):
             user=self.telegram_user,
             message_id=123,
             message_type='text',
-            content='Hello bot!',
+            content={'text': 'Hello bot!'},
             is_bot_message=False
         )
         
         self.assertEqual(message.user, self.telegram_user)
-        self.assertEqual(message.content, 'Hello bot!')
+        self.assertEqual(message.content, {'text': 'Hello bot!'})
         self.assertFalse(message.is_bot_message)
     
     def test_analytics_update(self):
         """Test analytics update."""
-        from datetime import date
-        
         analytics = BotAnalytics.objects.create(
-            date=date.today(),
+            date=_TODAY,
             total_users=1,
             active_users=1,
             messages_sent=0,
@@ -150,44 +316,36 @@ class BotIntegrationTestCase(TransactionTestCase):
         
         self.assertEqual(analytics.total_users, 1)
         self.assertEqual(analytics.messages_received, 1)
+    
+    def test_analytics_rollup_command(self):
+        """Test the analytics rollup recounts today's messages in place."""
+        BotMessage.objects.bulk_create([
+            BotMessage(user=self.telegram_user, message_id=1, content={'text': '/start'}),
+            BotMessage(user=self.telegram_user, message_id=2, content={'text': 'Hello'}),
+            BotMessage(user=self.telegram_user, message_id=3, content={'text': 'Hi!'}, is_bot_message=True),
+        ])
+        BotAnalytics.objects.create(date=timezone.localdate(), messages_received=99, errors_count=2)
+        
+        call_command('update_bot_analytics', stdout=io.StringIO())
+        
+        analytics = BotAnalytics.objects.get(date=timezone.localdate())
+        self.assertEqual(analytics.messages_received, 2)
+        self.assertEqual(analytics.messages_sent, 1)
+        self.assertEqual(analytics.commands_executed, 1)
+        self.assertEqual(analytics.active_users, 1)
+        self.assertEqual(analytics.total_users, 1)
+        self.assertEqual(analytics.errors_count, 2)
 
 
-class BotCommandTestCase(TestCase):
+class BotCommandTestCase(TelegramUserFixtureMixin, SharedBotMixin, TestCase):
     """Test cases for bot commands."""
     
-    def setUp(self):
-        """Set up test data."""
-        self.user = User.objects.create_user(
-            username='testuser',
-            email='test@example.com',
-            password='testpass123'
-        )
-        self.telegram_user = TelegramUser.objects.create(
-            user=self.user,
-            telegram_id=123456789,
-            username='testuser',
-            first_name='Test',
-            last_name='User'
-        )
+    databases = {'default'}
     
-    @patch('apps.telegram_bot.bot.settings.TELEGRAM_BOT_TOKEN', 'test_token')
     def test_start_command(self):
         """Test /start command."""
-        # Mock the update and context
-        mock_update = Mock()
-        mock_update.message = Mock()
-        mock_update.message.reply_text = AsyncMock()
-        mock_update.effective_user = Mock()
-        mock_update.effective_user.id = 123456789
-        mock_update.effective_user.username = 'testuser'
-        mock_update.effective_user.first_name = 'Test'
-        mock_update.effective_user.last_name = 'User'
-        mock_update.effective_user.language_code = 'en'
-        
-        mock_context = Mock()
-        
-        # Create bot and test command
-        bot = NotiBot()
+        # Use the shared bot to test the command
+        bot = self._bot
         
         # This would be an async test in a real scenario
         # For now, just test that the bot can be created
@@ -195,84 +353,84 @@ class BotCommandTestCase(TestCase):
     
     def test_help_command_structure(self):
         """Test help command structure."""
-        help_text = """
-🤖 **Noti Bot Commands**
-
-**Basic Commands:**
-/start - Start the bot and see main menu
-/help - Show this help message
-/cancel - Cancel current operation
-
-**Notification Commands:**
-/notifications - View your notifications
-/send_notification - Send a new notification
-
-**Settings & Stats:**
-/settings - Manage your notification settings
-/stats - View your usage statistics
-
-**Quick Actions:**
-Use the inline buttons for quick access to features!
-
-Need help? Contact support or use /start to return to the main menu.
-        """
-        
         # Test that help text contains expected commands
-        self.assertIn('/start', help_text)
-        self.assertIn('/help', help_text)
-        self.assertIn('/notifications', help_text)
-        self.assertIn('/settings', help_text)
-        self.assertIn('/stats', help_text)
+        for command in sorted(REQUIRED_COMMANDS):
+            with self.subTest(command=command):
+                self.assertIn(command, _HELP_TEXT)
 
 
-class BotWebhookTestCase(TestCase):
+class BotWebhookTestCase(SimpleTestCase):
     """Test cases for webhook functionality."""
     
     def test_webhook_view_structure(self):
         """Test webhook view structure."""
-        from apps.telegram_bot.webhook_server import TelegramWebhookView
-        
         # Test that the view exists and has required methods
         self.assertTrue(hasattr(TelegramWebhookView, 'post'))
     
     def test_webhook_data_processing(self):
         """Test webhook data processing."""
-        webhook_data = {
-            'update_id': 123456,
-            'message': {
-                'message_id': 1,
-                'from': {
-                    'id': 123456789,
-                    'username': 'testuser',
-                    'first_name': 'Test'
-                },
-                'text': 'Hello bot!'
-            }
-        }
-        
         # Test that data can be serialized/deserialized
-        json_data = json.dumps(webhook_data)
-        parsed_data = json.loads(json_data)
+        parsed_data = orjson.loads(_UPDATE_PAYLOAD_JSON)
         
         self.assertEqual(parsed_data['update_id'], 123456)
         self.assertEqual(parsed_data['message']['text'], 'Hello bot!')
+    
+    @override_settings(TELEGRAM_WEBHOOK_SECRET='')
+    def test_webhook_view_enqueues_update(self):
+        """Test the webhook view queues updates instead of handling them inline."""
+        request = RequestFactory().post(
+            '/webhook/telegram/', _UPDATE_PAYLOAD_JSON, content_type='application/json'
+        )
+        
+        with patch('apps.telegram_bot.webhook_server.process_telegram_update') as mock_task:
+            response = TelegramWebhookView.as_view()(request)
+        
+        self.assertEqual(response.status_code, 200)
+        mock_task.delay.assert_called_once_with(_UPDATE_PAYLOAD)
+    
+    @override_settings(TELEGRAM_WEBHOOK_SECRET='')
+    def test_webhook_view_rejects_non_update(self):
+        """Test the webhook view rejects JSON that is not a Telegram update."""
+        request = RequestFactory().post(
+            '/webhook/telegram/', b'{"message": {}}', content_type='application/json'
+        )
+        
+        with patch('apps.telegram_bot.webhook_server.process_telegram_update') as mock_task:
+            response = TelegramWebhookView.as_view()(request)
+        
+        self.assertEqual(response.status_code, 400)
+        mock_task.delay.assert_not_called()
 
 
 class BotManagementTestCase(TestCase):
     """Test cases for bot management commands."""
     
+    databases = {'default'}
+    
+    @classmethod
+    def setUpTestData(cls):
+        """Set up test data shared by every test in the class."""
+        BotCommandModel.objects.bulk_create([
+            BotCommandModel(
+                command='test',
+                description='Test command',
+                handler_function='test_handler',
+                is_active=True,
+                requires_auth=True,
+                admin_only=False
+            ),
+            # Reserved for test_command_management, which updates and deletes it
+            BotCommandModel(
+                command='managed',
+                description='Managed command',
+                handler_function='managed_handler',
+                is_active=False
+            ),
+        ])
+    
     def test_command_creation(self):
         """Test bot command creation."""
-        from apps.telegram_bot.models import BotCommand as BotCommandModel
-        
-        command = BotCommandModel.objects.create(
-            command='test',
-            description='Test command',
-            handler_function='test_handler',
-            is_active=True,
-            requires_auth=True,
-            admin_only=False
-        )
+        command = BotCommandModel.objects.get(command='test')
         
         self.assertEqual(command.command, 'test')
         self.assertEqual(command.description, 'Test command')
@@ -282,59 +440,43 @@ class BotManagementTestCase(TestCase):
     
     def test_command_management(self):
         """Test command management operations."""
-        from apps.telegram_bot.models import BotCommand as BotCommandModel
-        
-        # Create command
-        command = BotCommandModel.objects.create(
-            command='test',
-            description='Test command',
-            handler_function='test_handler'
-        )
+        command = BotCommandModel.objects.get(command='managed')
         
         # Update command
         command.is_active = True
         command.save()
         
         # Verify update
-        updated_command = BotCommandModel.objects.get(command='test')
+        updated_command = BotCommandModel.objects.get(command='managed')
         self.assertTrue(updated_command.is_active)
         
-        # Delete command
-        command.delete()
+        # Delete command and verify a single row went
+        deleted, _ = command.delete()
+        self.assertEqual(deleted, 1)
+    
+    def test_active_commands_registry(self):
+        """Test the registry serves only active commands."""
+        # bulk_create sends no post_save, so drop anything loaded earlier
+        bump_commands_revision()
         
-        # Verify deletion
-        self.assertFalse(BotCommandModel.objects.filter(command='test').exists())
+        commands = {command.command: command for command in get_active_commands()}
+        self.assertEqual(commands['test'].handler_function, 'test_handler')
+        self.assertNotIn('managed', commands)
 
 
-class BotErrorHandlingTestCase(TestCase):
+class BotErrorHandlingTestCase(SharedBotMixin, SimpleTestCase):
     """Test cases for bot error handling."""
     
     def test_error_handler_structure(self):
         """Test error handler structure."""
-        from apps.telegram_bot.bot import NotiBot
-        
-        with patch('apps.telegram_bot.bot.settings.TELEGRAM_BOT_TOKEN', 'test_token'):
-            bot = NotiBot()
-            
-            # Test that error handler exists
-            self.assertTrue(hasattr(bot, 'error_handler'))
-    
-    def test_telegram_error_handling(self):
-        """Test Telegram error handling."""
-        from telegram.error import TelegramError
-        
-        # Test that TelegramError can be caught
-        try:
-            raise TelegramError("Test error")
-        except TelegramError as e:
-            self.assertEqual(str(e), "Test error")
+        # Test that error handler exists
+        self.assertTrue(hasattr(self._bot, 'error_handler'))
     
     def test_bot_error_exception(self):
         """Test custom bot error exception."""
-        from apps.core.exceptions import TelegramBotError
+        error = TelegramBotError("Bot error")
         
-        # Test that TelegramBotError can be raised and caught
-        try:
-            raise TelegramBotError("Bot error")
-        except TelegramBotError as e:
-            self.assertEqual(str(e), "Bot error")
+        self.assertIsInstance(error, NotiAPIException)
+        self.assertEqual(str(error), "Bot error")
+        self.assertEqual(error.status_code, 400)
+        self.assertEqual(error.get_codes(), 'telegram_bot_error')
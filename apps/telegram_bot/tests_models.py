@@ -11,16 +11,31 @@ from apps.telegram_bot.models import (
 )
 
 
-class TelegramUserModelTestCase(TestCase):
+class UserFixtureMixin:
+    """Create the User, and by default its TelegramUser, shared by a test class."""
+    
+    with_telegram_user = True
+    
+    @classmethod
+    def setUpTestData(cls):
+        """Set up test data shared by every test in the class."""
+        # No test logs in, so skip password hashing altogether
+        cls.user = User(username='testuser', email='test@example.com')
+        cls.user.set_unusable_password()
+        cls.user.save()
+        if cls.with_telegram_user:
+            cls.telegram_user = TelegramUser.objects.create(
+                user=cls.user,
+                telegram_id=123456789,
+                username='testuser'
+            )
+
+
+class TelegramUserModelTestCase(UserFixtureMixin, TestCase):
     """Test cases for TelegramUser model."""
     
-    def setUp(self):
-        """Set up test data."""
-        self.user = User.objects.create_user(
-            username='testuser',
-            email='test@example.com',
-            password='testpass123'
-        )
+    # These tests create the Telegram profile themselves
+    with_telegram_user = False
     
     def test_telegram_user_creation(self):
         """Test TelegramUser creation."""
@@ -117,22 +132,9 @@ class TelegramUserModelTestCase(TestCase):
             )
 
 
-class BotConversationModelTestCase(TestCase):
+class BotConversationModelTestCase(UserFixtureMixin, TestCase):
     """Test cases for BotConversation model."""
     
-    def setUp(self):
-        """Set up test data."""
-        self.user = User.objects.create_user(
-            username='testuser',
-            email='test@example.com',
-            password='testpass123'
-        )
-        self.telegram_user = TelegramUser.objects.create(
-            user=self.user,
-            telegram_id=123456789,
-            username='testuser'
-        )
-    
     def test_bot_conversation_creation(self):
         """Test BotConversation creation."""
         conversation = BotConversation.objects.create(
@@ -254,36 +256,23 @@ class BotCommandModelTestCase(TestCase):
             )
 
 
-class BotMessageModelTestCase(TestCase):
+class BotMessageModelTestCase(UserFixtureMixin, TestCase):
     """Test cases for BotMessage model."""
     
-    def setUp(self):
-        """Set up test data."""
-        self.user = User.objects.create_user(
-            username='testuser',
-            email='test@example.com',
-            password='testpass123'
-        )
-        self.telegram_user = TelegramUser.objects.create(
-            user=self.user,
-            telegram_id=123456789,
-            username='testuser'
-        )
-    
     def test_bot_message_creation(self):
         """Test BotMessage creation."""
         message = BotMessage.objects.create(
             user=self.telegram_user,
             message_id=123,
             message_type='text',
-            content='Hello bot!',
+            content={'text': 'Hello bot!'},
             is_bot_message=False
         )
         
         self.assertEqual(message.user, self.telegram_user)
         self.assertEqual(message.message_id, 123)
         self.assertEqual(message.message_type, 'text')
-        self.assertEqual(message.content, 'Hello bot!')
+        self.assertEqual(message.content, {'text': 'Hello bot!'})
         self.assertFalse(message.is_bot_message)
         self.assertIsNone(message.reply_to_message)
         self.assertIsNotNone(message.created_at)
@@ -294,7 +283,7 @@ class BotMessageModelTestCase(TestCase):
             user=self.telegram_user,
             message_id=123,
             message_type='text',
-            content='Hello bot!'
+            content={'text': 'Hello bot!'}
         )
         expected = f'{self.telegram_user} - text - {message.created_at}'
         self.assertEqual(str(message), expected)
@@ -307,7 +296,7 @@ class BotMessageModelTestCase(TestCase):
         )
         
         self.assertEqual(message.message_type, 'text')
-        self.assertEqual(message.content, '')
+        self.assertEqual(message.content, {})
         self.assertFalse(message.is_bot_message)
         self.assertIsNone(message.reply_to_message)
     
@@ -316,13 +305,13 @@ class BotMessageModelTestCase(TestCase):
         original_message = BotMessage.objects.create(
             user=self.telegram_user,
             message_id=123,
-            content='Original message'
+            content={'text': 'Original message'}
         )
         
         reply_message = BotMessage.objects.create(
             user=self.telegram_user,
             message_id=124,
-            content='Reply message',
+            content={'text': 'Reply message'},
             reply_to_message=original_message
         )
         
@@ -334,12 +323,12 @@ class BotMessageModelTestCase(TestCase):
         msg1 = BotMessage.objects.create(
             user=self.telegram_user,
             message_id=123,
-            content='First message'
+            content={'text': 'First message'}
         )
         msg2 = BotMessage.objects.create(
             user=self.telegram_user,
             message_id=124,
-            content='Second message'
+            content={'text': 'Second message'}
         )
         
         # Get all messages
@@ -468,22 +457,9 @@ class BotAnalyticsModelTestCase(TestCase):
         self.assertEqual(analytics[1], analytics1)
 
 
-class ModelRelationshipsTestCase(TestCase):
+class ModelRelationshipsTestCase(UserFixtureMixin, TestCase):
     """Test cases for model relationships."""
     
-    def setUp(self):
-        """Set up test data."""
-        self.user = User.objects.create_user(
-            username='testuser',
-            email='test@example.com',
-            password='testpass123'
-        )
-        self.telegram_user = TelegramUser.objects.create(
-            user=self.user,
-            telegram_id=123456789,
-            username='testuser'
-        )
-    
     def test_telegram_user_user_relationship(self):
         """Test TelegramUser-User relationship."""
         self.assertEqual(self.telegram_user.user, self.user)
@@ -504,7 +480,7 @@ class ModelRelationshipsTestCase(TestCase):
         message = BotMessage.objects.create(
             user=self.telegram_user,
             message_id=123,
-            content='Test message'
+            content={'text': 'Test message'}
         )
         
         self.assertEqual(message.user, self.telegram_user)
@@ -515,13 +491,13 @@ class ModelRelationshipsTestCase(TestCase):
         original_message = BotMessage.objects.create(
             user=self.telegram_user,
             message_id=123,
-            content='Original'
+            content={'text': 'Original'}
         )
         
         reply_message = BotMessage.objects.create(
             user=self.telegram_user,
             message_id=124,
-            content='Reply',
+            content={'text': 'Reply'},
             reply_to_message=original_message
         )
         
@@ -537,7 +513,7 @@ class ModelRelationshipsTestCase(TestCase):
         message = BotMessage.objects.create(
             user=self.telegram_user,
             message_id=123,
-            content='Test message'
+            content={'text': 'Test message'}
         )
         
         # Delete telegram user
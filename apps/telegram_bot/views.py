@@ -2,16 +2,29 @@
 Telegram bot app views.
 """
 
-from django.http import JsonResponse
+import functools
+import hmac
+
+import orjson
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db.models import Prefetch
+from django.dispatch import receiver
+from django.http import HttpResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_POST
 from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from apps.core.middleware import rate_limit_headers_exempt
 from apps.core.permissions import IsTelegramBotOwner, IsAdminOrOwner
 from apps.core.rate_limiting import TelegramWebhookThrottle, APIEndpointThrottle
-import json
-from .bot import handle_telegram_update
+from .pagination import BotConversationCursorPagination, BotMessageCursorPagination
+from .registry import get_active_commands
+from .schemas import is_telegram_update
+from .security import expected_telegram_secret
+from .tasks import process_telegram_update
 from .models import (
     TelegramUser, BotConversation, BotCommand, BotMessage, 
     BotWebhook, BotAnalytics
@@ -35,6 +48,12 @@ class TelegramUserViewSet(viewsets.ModelViewSet):
     ordering_fields = ['created_at', 'updated_at']
     ordering = ['-created_at']
 
+    def get_queryset(self):
+        """
+        Join the linked auth user into the base query.
+        """
+        return super().get_queryset().select_related('user')
+
 
 class BotConversationViewSet(viewsets.ModelViewSet):
     """
@@ -43,9 +62,24 @@ class BotConversationViewSet(viewsets.ModelViewSet):
     queryset = BotConversation.objects.all()
     serializer_class = BotConversationSerializer
     permission_classes = [IsTelegramBotOwner]
+    pagination_class = BotConversationCursorPagination
     filterset_fields = ['state', 'user']
+    # ?ordering=last_activity still works, but the default the cursor pages on
+    # is the immutable created_at rather than Meta.ordering's last_activity
     ordering_fields = ['last_activity', 'created_at']
-    ordering = ['-last_activity']
+    ordering = ['-created_at']
+
+    def get_queryset(self):
+        """
+        Prefetch each distinct Telegram user, with its auth user, once.
+        
+        Users typically own many conversations, so a separate prefetch
+        shares one user instance across their rows instead of joining the
+        same wide user columns onto every conversation.
+        """
+        return super().get_queryset().prefetch_related(
+            Prefetch('user', queryset=TelegramUser.objects.select_related('user'))
+        )
 
 
 class BotCommandViewSet(viewsets.ModelViewSet):
@@ -64,8 +98,7 @@ class BotCommandViewSet(viewsets.ModelViewSet):
         """
         Get all active bot commands.
         """
-        commands = BotCommand.objects.filter(is_active=True)
-        serializer = self.get_serializer(commands, many=True)
+        serializer = self.get_serializer(get_active_commands(), many=True)
         return Response(serializer.data)
 
 
@@ -76,11 +109,20 @@ class BotMessageViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = BotMessage.objects.all()
     serializer_class = BotMessageSerializer
     permission_classes = [IsTelegramBotOwner]
+    pagination_class = BotMessageCursorPagination
     filterset_fields = ['message_type', 'is_bot_message', 'user']
-    search_fields = ['content']
+    search_fields = ['content__text']
     ordering_fields = ['created_at']
     ordering = ['-created_at']
 
+    def get_queryset(self):
+        """
+        Join the nested user and the replied-to message into the base query.
+        """
+        return super().get_queryset().select_related(
+            'user__user', 'reply_to_message__user'
+        )
+
 
 class BotWebhookViewSet(viewsets.ModelViewSet):
     """
@@ -104,51 +146,116 @@ class BotAnalyticsViewSet(viewsets.ReadOnlyModelViewSet):
     ordering_fields = ['date']
     ordering = ['-date']
 
+    def list(self, request, *args, **kwargs):
+        """
+        List analytics rows straight from ``.values()``.
+        
+        Every field is a scalar, so rows skip per-instance serialization;
+        only the date fields go through the serializer's formatting.
+        """
+        fields = self.get_serializer().fields
+        queryset = self.filter_queryset(self.get_queryset()).values(*fields)
+        page = self.paginate_queryset(queryset)
+        rows = list(queryset if page is None else page)
+        for row in rows:
+            row['date'] = fields['date'].to_representation(row['date'])
+            row['created_at'] = fields['created_at'].to_representation(row['created_at'])
+        if page is None:
+            return Response(rows)
+        return self.get_paginated_response(rows)
+
+
+# Fixed webhook response bodies, encoded once. Responses themselves are built
+# per request, since middleware sets headers on the response object.
+_OK_BODY = orjson.dumps({'status': 'ok'})
+_UNAUTHORIZED_BODY = orjson.dumps({'error': 'Unauthorized'})
+_RATE_LIMITED_BODY = orjson.dumps({'error': 'Rate limited'})
+_TOO_LARGE_BODY = orjson.dumps({'error': 'Payload too large'})
+_INVALID_JSON_BODY = orjson.dumps({'error': 'Invalid JSON'})
+_INVALID_UPDATE_BODY = orjson.dumps({'error': 'Invalid update'})
+_SERVER_ERROR_BODY = orjson.dumps({'error': 'Internal server error'})
+
+# Telegram updates are a few KB; anything far larger is not one of them
+TELEGRAM_WEBHOOK_MAX_BODY_SIZE = 64 * 1024
+
 
 def verify_telegram_secret(secret_token):
     """
-    Verify Telegram webhook secret token.
+    Verify Telegram webhook secret token in constant time.
+    """
+    if secret_token is None:
+        return False
+    return hmac.compare_digest(secret_token.encode(), expected_telegram_secret())
+
+
+@functools.lru_cache(maxsize=1)
+def _webhook_throttle():
+    """
+    Build the webhook throttle once; it parses its rate and opens a Redis client.
+    """
+    return TelegramWebhookThrottle()
+
+
+@receiver(setting_changed)
+def _reset_webhook_throttle(setting, **kwargs):
+    """
+    Drop the cached webhook throttle when its rate is overridden.
     """
-    from django.conf import settings
-    expected_token = getattr(settings, 'TELEGRAM_WEBHOOK_SECRET', '')
-    return secret_token == expected_token
+    if setting == 'TELEGRAM_WEBHOOK_RATE_LIMIT':
+        _webhook_throttle.cache_clear()
 
 
 def is_rate_limited(ip_address):
     """
     Check if IP address is rate limited.
     """
-    from apps.core.rate_limiting import TelegramWebhookThrottle
-    throttle = TelegramWebhookThrottle()
-    # Create a mock request object for rate limiting
-    class MockRequest:
-        def __init__(self, ip):
-            self.META = {'REMOTE_ADDR': ip}
-            self.user = None
-    
-    mock_request = MockRequest(ip_address)
-    return not throttle.allow_request(mock_request, None)
+    if not getattr(settings, 'RATE_LIMIT_ENABLED', True):
+        return False
+    throttle = _webhook_throttle()
+    count = throttle.limiter.hit(f"telegram:webhook:ip:{ip_address}", throttle.window)
+    return count > throttle.limit
 
 
+@rate_limit_headers_exempt
 @csrf_exempt
 @require_POST
 def telegram_webhook(request):
     """
     Telegram webhook endpoint with security measures.
+    
+    The view stays synchronous: it only verifies, parses and enqueues, while
+    the bot logic and its outbound Telegram API calls run in a Celery worker.
     """
+    # 0. Reject oversized bodies before anything buffers them
+    try:
+        content_length = int(request.META.get('CONTENT_LENGTH') or 0)
+    except ValueError:
+        content_length = 0
+    if content_length > TELEGRAM_WEBHOOK_MAX_BODY_SIZE:
+        return HttpResponse(_TOO_LARGE_BODY, content_type='application/json', status=413)
+    
     # 1. Verify the request is from Telegram
     secret_token = request.META.get('HTTP_X_TELEGRAM_BOT_API_SECRET_TOKEN')
     if not verify_telegram_secret(secret_token):
-        return JsonResponse({'error': 'Unauthorized'}, status=401)
+        return HttpResponse(_UNAUTHORIZED_BODY, content_type='application/json', status=401)
     
     # 2. Rate limiting
     if is_rate_limited(request.META.get('REMOTE_ADDR')):
-        return JsonResponse({'error': 'Rate limited'}, status=429)
+        return HttpResponse(_RATE_LIMITED_BODY, content_type='application/json', status=429)
     
     # 3. Process the webhook
     try:
-        update_data = json.loads(request.body)
-        handle_telegram_update(update_data)
-        return JsonResponse({'status': 'ok'})
-    except Exception as e:
-        return JsonResponse({'status': 'error', 'message': str(e)}, status=400)
+        # orjson parses the raw body bytes without decoding to str first
+        update_data = orjson.loads(request.body)
+    except orjson.JSONDecodeError:
+        return HttpResponse(_INVALID_JSON_BODY, content_type='application/json', status=400)
+    if not is_telegram_update(update_data):
+        return HttpResponse(_INVALID_UPDATE_BODY, content_type='application/json', status=400)
+    
+    try:
+        # Hand off to a worker so the response doesn't wait on bot logic
+        process_telegram_update.delay(update_data)
+    except Exception:
+        # A 5xx makes Telegram redeliver the update once the queue is back
+        return HttpResponse(_SERVER_ERROR_BODY, content_type='application/json', status=500)
+    return HttpResponse(_OK_BODY, content_type='application/json')
@@ -3,20 +3,31 @@ Webhook server for Telegram bot in production.
 """
 
 import asyncio
+import hmac
 import logging
+import signal
 from typing import Dict, Any
 
+import orjson
+
 from django.conf import settings
-from django.http import JsonResponse
+from django.core.exceptions import ImproperlyConfigured
+from django.http import HttpResponse, JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_POST
 from django.utils.decorators import method_decorator
 from django.views import View
 
-from .bot import get_bot, handle_telegram_update
+from .bot import get_bot
+from .schemas import is_telegram_update
+from .security import expected_telegram_secret
+from .tasks import process_telegram_update
 
 logger = logging.getLogger(__name__)
 
+# Encoded once; the success body never changes
+_OK_BODY = orjson.dumps({'status': 'ok'})
+
 
 @method_decorator(csrf_exempt, name='dispatch')
 @method_decorator(require_POST, name='dispatch')
@@ -28,22 +39,28 @@ class TelegramWebhookView(View):
     def post(self, request):
         """Handle incoming webhook requests."""
         try:
-            # Get the raw request body
-            import json
-            update_data = json.loads(request.body)
-            
-            # Verify webhook secret if configured
+            # Verify webhook secret if configured, before touching the body
             secret_token = request.META.get('HTTP_X_TELEGRAM_BOT_API_SECRET_TOKEN')
-            if settings.TELEGRAM_WEBHOOK_SECRET and secret_token != settings.TELEGRAM_WEBHOOK_SECRET:
+            expected = expected_telegram_secret()
+            # compare_digest takes the same time wherever the tokens differ
+            if expected and not (
+                secret_token and hmac.compare_digest(secret_token.encode(), expected)
+            ):
                 logger.warning("Invalid webhook secret token")
                 return JsonResponse({'error': 'Unauthorized'}, status=401)
             
-            # Process the update
-            handle_telegram_update(update_data)
+            # orjson parses the raw body bytes without decoding to str first
+            update_data = orjson.loads(request.body)
+            if not is_telegram_update(update_data):
+                logger.error("Webhook request is not a Telegram update")
+                return JsonResponse({'error': 'Invalid update'}, status=400)
+            
+            # Hand off to a worker so the response doesn't wait on bot logic
+            process_telegram_update.delay(update_data)
             
-            return JsonResponse({'status': 'ok'})
+            return HttpResponse(_OK_BODY, content_type='application/json')
             
-        except json.JSONDecodeError:
+        except orjson.JSONDecodeError:
             logger.error("Invalid JSON in webhook request")
             return JsonResponse({'error': 'Invalid JSON'}, status=400)
         except Exception as e:
@@ -57,8 +74,12 @@ class WebhookServer:
     """
     
     def __init__(self, host='0.0.0.0', port=8443):
+        if not settings.TELEGRAM_WEBHOOK_URL:
+            raise ImproperlyConfigured("TELEGRAM_WEBHOOK_URL must be set to run the webhook server")
         self.host = host
         self.port = port
+        self.webhook_url = f"{settings.TELEGRAM_WEBHOOK_URL.rstrip('/')}/webhook/telegram/"
+        self.secret = settings.TELEGRAM_WEBHOOK_SECRET
         self.bot = get_bot()
     
     async def start(self):
@@ -69,12 +90,11 @@ class WebhookServer:
         
         try:
             # Set webhook URL
-            webhook_url = f"{settings.TELEGRAM_WEBHOOK_URL}/webhook/telegram/"
             await self.bot.bot.set_webhook(
-                url=webhook_url,
-                secret_token=settings.TELEGRAM_WEBHOOK_SECRET
+                url=self.webhook_url,
+                secret_token=self.secret
             )
-            logger.info(f"Webhook set to: {webhook_url}")
+            logger.info(f"Webhook set to: {self.webhook_url}")
             
             # Start the bot application
             await self.bot.application.initialize()
@@ -99,11 +119,15 @@ async def run_webhook_server(host='0.0.0.0', port=8443):
     server = WebhookServer(host, port)
     await server.start()
     
+    # Park the loop until SIGINT/SIGTERM instead of waking it every second
+    stop_event = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop_event.set)
+    
     try:
-        # Keep the server running
-        while True:
-            await asyncio.sleep(1)
-    except KeyboardInterrupt:
+        await stop_event.wait()
+    finally:
         logger.info("Shutting down webhook server...")
         await server.stop()
 
@@ -113,4 +137,11 @@ if __name__ == '__main__':
     host = sys.argv[1] if len(sys.argv) > 1 else '0.0.0.0'
     port = int(sys.argv[2]) if len(sys.argv) > 2 else 8443
     
+    try:
+        # uvloop, when installed, is a faster drop-in for the default loop
+        import uvloop
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    except ImportError:
+        pass
+    
     asyncio.run(run_webhook_server(host, port))
@@ -6,9 +6,12 @@ from django.test import TestCase, TransactionTestCase
 from django.contrib.auth.models import User
 from rest_framework.test import APITestCase
 from rest_framework.authtoken.models import Token
-from datetime import datetime, timezone, timedelta
+from datetime import datetime, timezone, timedelta, date as _date_cls
 from unittest.mock import patch, MagicMock
+from collections import deque
+import itertools
 import json
+import orjson
 
 from apps.core.models import UserProfile, SystemSettings, AuditLog
 from apps.notifications.models import (
@@ -25,6 +28,9 @@ from apps.telegram_bot.models import (
 class TestDataFactory:
     """Factory class for creating test data."""
     
+    # Rows per INSERT for the bulk_* helpers
+    BULK_BATCH_SIZE = 500
+    
     @staticmethod
     def create_user(username='testuser', email='test@example.com', password='testpass123', **kwargs):
         """Create a test user."""
@@ -68,6 +74,20 @@ class TestDataFactory:
         defaults.update(kwargs)
         return AuditLog.objects.create(user=user, action=action, resource=resource, **defaults)
     
+    @staticmethod
+    def bulk_create_audit_logs(user, count, action='test_action', resource='test_resource', **kwargs):
+        """Create ``count`` test audit logs in batched INSERTs."""
+        defaults = {
+            'details': '{"test": "details"}',
+            'ip_address': '192.168.1.1',
+            'user_agent': 'Test Agent'
+        }
+        defaults.update(kwargs)
+        return AuditLog.objects.bulk_create(
+            [AuditLog(user=user, action=action, resource=resource, **defaults) for _ in range(count)],
+            batch_size=TestDataFactory.BULK_BATCH_SIZE
+        )
+    
     @staticmethod
     def create_notification_template(name='test_template', **kwargs):
         """Create a test notification template."""
@@ -104,6 +124,23 @@ class TestDataFactory:
             defaults['template'] = template
         return Notification.objects.create(user=user, **defaults)
     
+    @staticmethod
+    def bulk_create_notifications(users, template=None, **kwargs):
+        """Create one test notification per user in batched INSERTs."""
+        defaults = {
+            'title': 'Test Notification',
+            'message': 'This is a test notification',
+            'notification_type': 'info',
+            'priority': 'normal'
+        }
+        defaults.update(kwargs)
+        if template:
+            defaults['template'] = template
+        return Notification.objects.bulk_create(
+            [Notification(user=user, **defaults) for user in users],
+            batch_size=TestDataFactory.BULK_BATCH_SIZE
+        )
+    
     @staticmethod
     def create_notification_delivery(notification, channel, **kwargs):
         """Create a test notification delivery."""
@@ -193,12 +230,29 @@ class TestDataFactory:
         """Create a test bot message."""
         defaults = {
             'message_type': 'text',
-            'content': 'Test message',
+            'content': {'text': 'Test message'},
             'is_bot_message': False
         }
         defaults.update(kwargs)
         return BotMessage.objects.create(user=telegram_user, message_id=message_id, **defaults)
     
+    @staticmethod
+    def bulk_create_bot_messages(telegram_user, count, first_message_id=1, **kwargs):
+        """Create ``count`` test bot messages with consecutive message IDs."""
+        defaults = {
+            'message_type': 'text',
+            'content': {'text': 'Test message'},
+            'is_bot_message': False
+        }
+        defaults.update(kwargs)
+        return BotMessage.objects.bulk_create(
+            [
+                BotMessage(user=telegram_user, message_id=message_id, **defaults)
+                for message_id in range(first_message_id, first_message_id + count)
+            ],
+            batch_size=TestDataFactory.BULK_BATCH_SIZE
+        )
+    
     @staticmethod
     def create_bot_webhook(webhook_url='https://example.com/webhook', **kwargs):
         """Create a test bot webhook."""
@@ -214,8 +268,7 @@ class TestDataFactory:
     def create_bot_analytics(date=None, **kwargs):
         """Create a test bot analytics record."""
         if date is None:
-            from datetime import date
-            date = date.today()
+            date = _date_cls.today()
         
         defaults = {
             'total_users': 100,
@@ -232,12 +285,26 @@ class TestDataFactory:
 class MockTelegramBot:
     """Mock Telegram bot for testing."""
     
+    # Oldest sent messages and callbacks are dropped past this many
+    HISTORY_LIMIT = 10_000
+    
     def __init__(self, token='test_token'):
         self.token = token
         self.webhook_url = None
         self.commands = []
-        self.messages_sent = []
-        self.callbacks_handled = []
+        self.messages_sent = deque(maxlen=self.HISTORY_LIMIT)
+        self.callbacks_handled = deque(maxlen=self.HISTORY_LIMIT)
+        self._message_ids = itertools.count(1)
+    
+    def _record_message(self, chat_id, **fields):
+        """Record an outgoing message under the next message ID."""
+        message = {
+            'chat_id': chat_id,
+            'message_id': next(self._message_ids),
+            **fields
+        }
+        self.messages_sent.append(message)
+        return message
     
     def set_webhook(self, url, secret_token=None):
         """Mock set webhook."""
@@ -258,36 +325,15 @@ class MockTelegramBot:
     
     def send_message(self, chat_id, text, **kwargs):
         """Mock send message."""
-        message = {
-            'chat_id': chat_id,
-            'text': text,
-            'message_id': len(self.messages_sent) + 1,
-            **kwargs
-        }
-        self.messages_sent.append(message)
-        return message
+        return self._record_message(chat_id, text=text, **kwargs)
     
     def send_photo(self, chat_id, photo, **kwargs):
         """Mock send photo."""
-        message = {
-            'chat_id': chat_id,
-            'photo': photo,
-            'message_id': len(self.messages_sent) + 1,
-            **kwargs
-        }
-        self.messages_sent.append(message)
-        return message
+        return self._record_message(chat_id, photo=photo, **kwargs)
     
     def send_document(self, chat_id, document, **kwargs):
         """Mock send document."""
-        message = {
-            'chat_id': chat_id,
-            'document': document,
-            'message_id': len(self.messages_sent) + 1,
-            **kwargs
-        }
-        self.messages_sent.append(message)
-        return message
+        return self._record_message(chat_id, document=document, **kwargs)
     
     def answer_callback_query(self, callback_query_id, text=None, **kwargs):
         """Mock answer callback query."""
@@ -300,66 +346,77 @@ class MockTelegramBot:
         return callback
 
 
+# Payload templates, kept encoded so each call decodes a fresh deep copy
+_TELEGRAM_FROM = {
+    'id': 123456789,
+    'username': 'testuser',
+    'first_name': 'Test',
+    'last_name': 'User'
+}
+_TELEGRAM_CHAT = {
+    'id': 123456789,
+    'type': 'private'
+}
+_WEBHOOK_PAYLOAD_TEMPLATE = orjson.dumps({
+    'update_id': 0,
+    'message': {
+        'message_id': 1,
+        'from': _TELEGRAM_FROM,
+        'text': '',
+        'chat': _TELEGRAM_CHAT
+    }
+})
+_CALLBACK_QUERY_PAYLOAD_TEMPLATE = orjson.dumps({
+    'update_id': 0,
+    'callback_query': {
+        'id': 'callback_123',
+        'from': _TELEGRAM_FROM,
+        'data': '',
+        'message': {
+            'message_id': 1,
+            'chat': _TELEGRAM_CHAT
+        }
+    }
+})
+
+
 class TestUtilities:
     """Utility functions for testing."""
     
     @staticmethod
     def create_authenticated_client(user):
-        """Create an authenticated API client."""
+        """Create an API client authenticated as ``user`` without a token row."""
         from rest_framework.test import APIClient
-        from rest_framework.authtoken.models import Token
         
         client = APIClient()
-        token = Token.objects.create(user=user)
+        client.force_authenticate(user=user)
+        return client
+    
+    @staticmethod
+    def create_token_authenticated_client(user):
+        """Create an API client that sends a real auth token, for token auth tests."""
+        from rest_framework.test import APIClient
+        
+        client = APIClient()
+        token, _ = Token.objects.get_or_create(user=user)
         client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
         return client
     
     @staticmethod
     def create_webhook_payload(update_id=123456, message_text='Hello bot!', **kwargs):
         """Create a mock webhook payload."""
-        defaults = {
-            'update_id': update_id,
-            'message': {
-                'message_id': 1,
-                'from': {
-                    'id': 123456789,
-                    'username': 'testuser',
-                    'first_name': 'Test',
-                    'last_name': 'User'
-                },
-                'text': message_text,
-                'chat': {
-                    'id': 123456789,
-                    'type': 'private'
-                }
-            }
-        }
+        defaults = orjson.loads(_WEBHOOK_PAYLOAD_TEMPLATE)
+        defaults['update_id'] = update_id
+        defaults['message']['text'] = message_text
         defaults.update(kwargs)
         return defaults
     
     @staticmethod
     def create_callback_query_payload(update_id=123456, data='test_callback', **kwargs):
         """Create a mock callback query payload."""
-        defaults = {
-            'update_id': update_id,
-            'callback_query': {
-                'id': 'callback_123',
-                'from': {
-                    'id': 123456789,
-                    'username': 'testuser',
-                    'first_name': 'Test',
-                    'last_name': 'User'
-                },
-                'data': data,
-                'message': {
-                    'message_id': 1,
-                    'chat': {
-                        'id': 123456789,
-                        'type': 'private'
-                    }
-                }
-            }
-        }
+        defaults = orjson.loads(_CALLBACK_QUERY_PAYLOAD_TEMPLATE)
+        defaults['update_id'] = update_id
+        defaults['callback_query']['data'] = data
         defaults.update(kwargs)
         return defaults
     
@@ -371,7 +428,7 @@ class TestUtilities:
             title=title,
             message=message,
             notification_type=notification_type
-        ).first()
+        ).order_by('pk').first()
         assert notification is not None, f"Notification not found: {title}"
         return notification
     
@@ -382,7 +439,7 @@ class TestUtilities:
             user=user,
             action=action,
             resource=resource
-        ).first()
+        ).order_by('pk').first()
         assert audit_log is not None, f"Audit log not found: {action} on {resource}"
         return audit_log
     
@@ -392,7 +449,7 @@ class TestUtilities:
         telegram_user = TelegramUser.objects.filter(
             user=user,
             telegram_id=telegram_id
-        ).first()
+        ).order_by('pk').first()
         assert telegram_user is not None, f"Telegram user not found: {telegram_id}"
         return telegram_user
     
@@ -402,7 +459,7 @@ class TestUtilities:
         message = BotMessage.objects.filter(
             user=telegram_user,
             content=content
-        ).first()
+        ).order_by('pk').first()
         assert message is not None, f"Bot message not found: {content}"
         return message
 
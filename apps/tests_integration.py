@@ -1,16 +1,21 @@
 """
 Integration tests for the entire notification system.
+
+None of these workflows depends on committed data or on_commit callbacks, so
+every class stays on APITestCase (savepoint rollback). A test that genuinely
+needs TransactionTestCase belongs in its own class so the per-test table
+flush is paid only there.
 """
 
-from django.test import TestCase, TransactionTestCase
+from django.test import TestCase, override_settings
 from django.contrib.auth.models import User
 from django.urls import reverse
 from rest_framework.test import APITestCase
 from rest_framework import status
-from rest_framework.authtoken.models import Token
 from datetime import datetime, timezone, timedelta
+from functools import lru_cache
 from unittest.mock import patch, MagicMock
-import json
+import orjson
 
 from apps.core.models import UserProfile, SystemSettings, AuditLog
 from apps.notifications.models import (
@@ -24,21 +29,43 @@ from apps.telegram_bot.models import (
 )
 
 
+@lru_cache(maxsize=None)
+def _url(name):
+    """Resolve an argument-free route name once for the whole module."""
+    return reverse(name)
+
+
+_WEBHOOK_PAYLOAD = {
+    'update_id': 123456,
+    'message': {
+        'message_id': 1,
+        'from': {
+            'id': 123456789,
+            'username': 'testuser',
+            'first_name': 'Test',
+            'last_name': 'User'
+        },
+        'text': '/test'
+    }
+}
+# Encoded once so the webhook test posts raw bytes, as Telegram does
+_WEBHOOK_BODY = orjson.dumps(_WEBHOOK_PAYLOAD)
+
+
 class NotificationWorkflowTestCase(APITestCase):
     """Test complete notification workflow from creation to delivery."""
     
-    def setUp(self):
-        """Set up test data."""
-        self.user = User.objects.create_user(
+    @classmethod
+    def setUpTestData(cls):
+        """Set up test data shared by every test in the class."""
+        cls.user = User.objects.create_user(
             username='testuser',
             email='test@example.com',
             password='testpass123'
         )
-        self.token = Token.objects.create(user=self.user)
-        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
         
         # Create notification template
-        self.template = NotificationTemplate.objects.create(
+        cls.template = NotificationTemplate.objects.create(
             name='welcome_template',
             title_template='Welcome {user}!',
             message_template='Hello {user}, welcome to our service!',
@@ -46,7 +73,7 @@ class NotificationWorkflowTestCase(APITestCase):
         )
         
         # Create notification channel
-        self.channel = NotificationChannel.objects.create(
+        cls.channel = NotificationChannel.objects.create(
             name='email_channel',
             channel_type='email',
             config='{"smtp_server": "smtp.example.com"}',
@@ -54,13 +81,17 @@ class NotificationWorkflowTestCase(APITestCase):
         )
         
         # Create notification subscription
-        self.subscription = NotificationSubscription.objects.create(
-            user=self.user,
-            channel=self.channel,
+        cls.subscription = NotificationSubscription.objects.create(
+            user=cls.user,
+            channel=cls.channel,
             notification_types=['info', 'warning'],
             is_enabled=True
         )
     
+    def setUp(self):
+        """Authenticate the per-test API client without a token lookup."""
+        self.client.force_authenticate(user=self.user)
+    
     def test_complete_notification_workflow(self):
         """Test complete notification workflow."""
         # 1. Create notification
@@ -71,27 +102,26 @@ class NotificationWorkflowTestCase(APITestCase):
             'priority': 'normal'
         }
         
-        url = reverse('notification-list')
+        url = _url('notification-list')
         response = self.client.post(url, notification_data)
         
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
         notification_id = response.data['id']
         
         # 2. Verify notification was created
-        notification = Notification.objects.get(id=notification_id)
-        self.assertEqual(notification.user, self.user)
-        self.assertEqual(notification.title, 'Welcome Test User!')
-        self.assertFalse(notification.is_read)
+        self.assertEqual(response.data['user'], str(self.user))
+        self.assertEqual(response.data['title'], 'Welcome Test User!')
+        self.assertFalse(response.data['is_read'])
         
         # 3. Create delivery record
         delivery = NotificationDelivery.objects.create(
-            notification=notification,
+            notification_id=notification_id,
             channel=self.channel,
             status='pending',
             external_id='delivery_123'
         )
         
-        self.assertEqual(delivery.notification, notification)
+        self.assertEqual(delivery.notification_id, notification_id)
         self.assertEqual(delivery.channel, self.channel)
         self.assertEqual(delivery.status, 'pending')
         
@@ -107,13 +137,18 @@ class NotificationWorkflowTestCase(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertTrue(response.data['is_read'])
         
-        # 6. Verify final state
-        notification.refresh_from_db()
-        self.assertTrue(notification.is_read)
+        # 6. Verify final state, selecting only the asserted columns
+        notification = Notification.objects.values('user_id', 'is_read').get(
+            id=notification_id
+        )
+        self.assertEqual(notification['user_id'], self.user.id)
+        self.assertTrue(notification['is_read'])
         
-        delivery.refresh_from_db()
-        self.assertEqual(delivery.status, 'delivered')
-        self.assertIsNotNone(delivery.delivered_at)
+        delivery = NotificationDelivery.objects.values('status', 'delivered_at').get(
+            id=delivery.id
+        )
+        self.assertEqual(delivery['status'], 'delivered')
+        self.assertIsNotNone(delivery['delivered_at'])
     
     def test_notification_template_workflow(self):
         """Test notification template workflow."""
@@ -126,7 +161,7 @@ class NotificationWorkflowTestCase(APITestCase):
             'is_active': True
         }
         
-        url = reverse('notificationtemplate-list')
+        url = _url('notificationtemplate-list')
         response = self.client.post(url, template_data)
         
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
@@ -141,7 +176,7 @@ class NotificationWorkflowTestCase(APITestCase):
             'priority': 'high'
         }
         
-        url = reverse('notification-list')
+        url = _url('notification-list')
         response = self.client.post(url, notification_data)
         
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
@@ -162,7 +197,7 @@ class NotificationWorkflowTestCase(APITestCase):
             'is_active': True
         }
         
-        url = reverse('notificationchannel-list')
+        url = _url('notificationchannel-list')
         response = self.client.post(url, channel_data)
         
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
@@ -175,7 +210,7 @@ class NotificationWorkflowTestCase(APITestCase):
             'is_enabled': True
         }
         
-        url = reverse('notificationsubscription-list')
+        url = _url('notificationsubscription-list')
         response = self.client.post(url, subscription_data)
         
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
@@ -202,22 +237,24 @@ class NotificationWorkflowTestCase(APITestCase):
         self.assertFalse(response.data['is_enabled'])
 
 
+@override_settings(TELEGRAM_WEBHOOK_SECRET='secret123')
 class TelegramBotWorkflowTestCase(APITestCase):
     """Test complete Telegram bot workflow."""
     
-    def setUp(self):
-        """Set up test data."""
-        self.user = User.objects.create_user(
+    @classmethod
+    def setUpTestData(cls):
+        """Set up test data shared by every test in the class."""
+        # Commands and webhooks are managed through admin-only endpoints
+        cls.user = User.objects.create_user(
             username='testuser',
             email='test@example.com',
-            password='testpass123'
+            password='testpass123',
+            is_staff=True
         )
-        self.token = Token.objects.create(user=self.user)
-        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
         
         # Create Telegram user
-        self.telegram_user = TelegramUser.objects.create(
-            user=self.user,
+        cls.telegram_user = TelegramUser.objects.create(
+            user=cls.user,
             telegram_id=123456789,
             username='testuser',
             first_name='Test',
@@ -226,7 +263,7 @@ class TelegramBotWorkflowTestCase(APITestCase):
         )
         
         # Create bot command
-        self.command = BotCommandModel.objects.create(
+        cls.command = BotCommandModel.objects.create(
             command='test',
             description='Test command',
             handler_function='test_handler',
@@ -235,6 +272,10 @@ class TelegramBotWorkflowTestCase(APITestCase):
             admin_only=False
         )
     
+    def setUp(self):
+        """Authenticate the per-test API client without a token lookup."""
+        self.client.force_authenticate(user=self.user)
+    
     def test_telegram_user_workflow(self):
         """Test Telegram user workflow."""
         # 1. Create new user
@@ -256,7 +297,7 @@ class TelegramBotWorkflowTestCase(APITestCase):
             'is_verified': True
         }
         
-        url = reverse('telegramuser-list')
+        url = _url('telegramuser-list')
         response = self.client.post(url, telegram_user_data)
         
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
@@ -269,7 +310,7 @@ class TelegramBotWorkflowTestCase(APITestCase):
             'context': {'step': 1, 'data': 'test'}
         }
         
-        url = reverse('botconversation-list')
+        url = _url('botconversation-list')
         response = self.client.post(url, conversation_data)
         
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
@@ -284,7 +325,7 @@ class TelegramBotWorkflowTestCase(APITestCase):
             'is_bot_message': False
         }
         
-        url = reverse('botmessage-list')
+        url = _url('botmessage-list')
         response = self.client.post(url, message_data)
         
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
@@ -303,17 +344,53 @@ class TelegramBotWorkflowTestCase(APITestCase):
         self.assertEqual(response.data['state'], 'processing')
         
         # 6. Verify relationships
-        telegram_user = TelegramUser.objects.get(id=telegram_user_id)
-        self.assertEqual(telegram_user.user, new_user)
-        self.assertEqual(telegram_user.telegram_id, 987654321)
-        
-        conversation = BotConversation.objects.get(id=conversation_id)
-        self.assertEqual(conversation.user, telegram_user)
-        self.assertEqual(conversation.state, 'processing')
+        self._assert_workflow_relationships(
+            message_id, conversation_id, telegram_user_id, new_user.id
+        )
+    
+    def test_telegram_user_relationships(self):
+        """Test the workflow's relationship checks on rows created directly."""
+        new_user = User.objects.create_user(username='newuser', password=None)
+        telegram_user = TelegramUser.objects.create(
+            user=new_user,
+            telegram_id=987654321,
+            username='newuser',
+            first_name='New'
+        )
+        conversation = BotConversation.objects.create(
+            user=telegram_user,
+            state='processing',
+            context={'step': 2, 'data': 'updated'}
+        )
+        message = BotMessage.objects.create(
+            user=telegram_user,
+            message_id=123,
+            message_type='text',
+            content={'text': 'Hello bot!'}
+        )
         
-        message = BotMessage.objects.get(id=message_id)
-        self.assertEqual(message.user, telegram_user)
-        self.assertEqual(message.content, 'Hello bot!')
+        self._assert_workflow_relationships(
+            message.id, conversation.id, telegram_user.id, new_user.id
+        )
+    
+    def _assert_workflow_relationships(self, message_id, conversation_id, telegram_user_id, user_id):
+        """Check the rows the Telegram user workflow links together."""
+        # The message query joins its Telegram user and FK ids are compared
+        # directly, so no related row is lazy-loaded
+        with self.assertNumQueries(2):
+            message = BotMessage.objects.select_related('user').get(id=message_id)
+            self.assertEqual(message.content, {'text': 'Hello bot!'})
+            
+            telegram_user = message.user
+            self.assertEqual(telegram_user.id, telegram_user_id)
+            self.assertEqual(telegram_user.user_id, user_id)
+            self.assertEqual(telegram_user.telegram_id, 987654321)
+            
+            conversation = BotConversation.objects.values('user_id', 'state').get(
+                id=conversation_id
+            )
+            self.assertEqual(conversation['user_id'], telegram_user_id)
+            self.assertEqual(conversation['state'], 'processing')
     
     def test_bot_command_workflow(self):
         """Test bot command workflow."""
@@ -327,7 +404,7 @@ class TelegramBotWorkflowTestCase(APITestCase):
             'admin_only': True
         }
         
-        url = reverse('botcommand-list')
+        url = _url('botcommand-list')
         response = self.client.post(url, command_data)
         
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
@@ -347,7 +424,7 @@ class TelegramBotWorkflowTestCase(APITestCase):
         self.assertFalse(response.data['is_active'])
         
         # 3. Get active commands
-        url = reverse('botcommand-active')
+        url = _url('botcommand-active')
         response = self.client.get(url)
         
         self.assertEqual(response.status_code, status.HTTP_200_OK)
@@ -363,7 +440,7 @@ class TelegramBotWorkflowTestCase(APITestCase):
             'last_update_id': 0
         }
         
-        url = reverse('botwebhook-list')
+        url = _url('botwebhook-list')
         response = self.client.post(url, webhook_data)
         
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
@@ -383,61 +460,35 @@ class TelegramBotWorkflowTestCase(APITestCase):
         self.assertFalse(response.data['is_active'])
         
         # 3. Test webhook endpoint
-        webhook_url = reverse('telegram-webhook')
-        webhook_payload = {
-            'update_id': 123456,
-            'message': {
-                'message_id': 1,
-                'from': {
-                    'id': 123456789,
-                    'username': 'testuser',
-                    'first_name': 'Test',
-                    'last_name': 'User'
-                },
-                'text': '/test'
-            }
-        }
+        webhook_url = _url('telegram_webhook')
         
-        response = self.client.post(
-            webhook_url,
-            data=json.dumps(webhook_payload),
-            content_type='application/json'
-        )
+        # Stop at the queue boundary: the bot's Bot API calls are not under test
+        with patch('apps.telegram_bot.views.process_telegram_update') as mock_task:
+            response = self.client.post(
+                webhook_url, _WEBHOOK_BODY, content_type='application/json',
+                HTTP_X_TELEGRAM_BOT_API_SECRET_TOKEN='secret123'
+            )
         
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(response.data['status'], 'ok')
+        self.assertEqual(orjson.loads(response.content)['status'], 'ok')
+        mock_task.delay.assert_called_once_with(_WEBHOOK_PAYLOAD)
 
 
 class SystemIntegrationTestCase(APITestCase):
     """Test system-wide integration scenarios."""
     
-    def setUp(self):
-        """Set up test data."""
-        self.user = User.objects.create_user(
+    @classmethod
+    def setUpTestData(cls):
+        """Set up test data shared by every test in the class."""
+        cls.user = User.objects.create_user(
             username='testuser',
             email='test@example.com',
             password='testpass123'
         )
-        self.token = Token.objects.create(user=self.user)
-        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
-        
-        # Create system settings
-        self.setting = SystemSettings.objects.create(
-            key='test_integration_setting',
-            value='{"test": "value"}',
-            description='Test integration setting',
-            is_active=True
-        )
-        
-        # Create audit log
-        self.audit_log = AuditLog.objects.create(
-            user=self.user,
-            action='test_action',
-            resource='test_resource',
-            details='{"test": "details"}',
-            ip_address='192.168.1.1',
-            user_agent='Test Agent'
-        )
+    
+    def setUp(self):
+        """Authenticate the per-test API client without a token lookup."""
+        self.client.force_authenticate(user=self.user)
     
     def test_system_settings_workflow(self):
         """Test system settings workflow."""
@@ -449,7 +500,7 @@ class SystemIntegrationTestCase(APITestCase):
             'is_active': True
         }
         
-        url = reverse('systemsettings-list')
+        url = _url('systemsettings-list')
         response = self.client.post(url, setting_data)
         
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
@@ -484,7 +535,7 @@ class SystemIntegrationTestCase(APITestCase):
             'user_agent': 'Integration Test Agent'
         }
         
-        url = reverse('auditlog-list')
+        url = _url('auditlog-list')
         response = self.client.post(url, audit_data)
         
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
@@ -498,7 +549,7 @@ class SystemIntegrationTestCase(APITestCase):
         self.assertEqual(audit_log.details, '{"integration": "test"}')
         
         # 3. Test audit log filtering
-        url = reverse('auditlog-list')
+        url = _url('auditlog-list')
         response = self.client.get(url, {'action': 'integration_test_action'})
         
         self.assertEqual(response.status_code, status.HTTP_200_OK)
@@ -514,7 +565,7 @@ class SystemIntegrationTestCase(APITestCase):
             'is_verified': True
         }
         
-        url = reverse('userprofile-list')
+        url = _url('userprofile-list')
         response = self.client.post(url, profile_data)
         
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
@@ -546,27 +597,29 @@ class SystemIntegrationTestCase(APITestCase):
 class PerformanceTestCase(APITestCase):
     """Test performance-related scenarios."""
     
-    def setUp(self):
-        """Set up test data."""
-        self.user = User.objects.create_user(
+    @classmethod
+    def setUpTestData(cls):
+        """Set up test data shared by every test in the class."""
+        cls.user = User.objects.create_user(
             username='testuser',
             email='test@example.com',
             password='testpass123'
         )
-        self.token = Token.objects.create(user=self.user)
-        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
-        
-        # Create multiple users for pagination testing
-        for i in range(50):
-            User.objects.create_user(
-                username=f'user{i}',
-                email=f'user{i}@example.com',
-                password='testpass123'
-            )
+        
+        # Create multiple users for pagination testing; none of them logs
+        # in, so one INSERT with unusable passwords skips hashing entirely
+        User.objects.bulk_create([
+            User(username=f'user{i}', email=f'user{i}@example.com', password='!')
+            for i in range(50)
+        ])
+    
+    def setUp(self):
+        """Authenticate the per-test API client without a token lookup."""
+        self.client.force_authenticate(user=self.user)
     
     def test_pagination_performance(self):
         """Test pagination performance."""
-        url = reverse('user-list')
+        url = _url('user-list')
         response = self.client.get(url)
         
         self.assertEqual(response.status_code, status.HTTP_200_OK)
@@ -582,7 +635,7 @@ class PerformanceTestCase(APITestCase):
     
     def test_search_performance(self):
         """Test search performance."""
-        url = reverse('user-list')
+        url = _url('user-list')
         response = self.client.get(url, {'search': 'user'})
         
         self.assertEqual(response.status_code, status.HTTP_200_OK)
@@ -590,7 +643,7 @@ class PerformanceTestCase(APITestCase):
     
     def test_ordering_performance(self):
         """Test ordering performance."""
-        url = reverse('user-list')
+        url = _url('user-list')
         response = self.client.get(url, {'ordering': 'username'})
         
         self.assertEqual(response.status_code, status.HTTP_200_OK)
@@ -0,0 +1,18 @@
+"""
+pytest configuration for the Noti project.
+
+pytest-django does not go through ``TEST_RUNNER``, so the runner's network
+guard is installed here as well.
+"""
+
+import pytest
+
+from noti.test_runner import guard_network
+
+
+@pytest.fixture(scope='session', autouse=True)
+def _refuse_outbound_network():
+    """Refuse non-loopback connections for the whole pytest session."""
+    restore = guard_network()
+    yield
+    restore()
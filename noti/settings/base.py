@@ -4,6 +4,7 @@ Base settings for Noti project.
 
 import os
 from pathlib import Path
+from celery.schedules import crontab
 from decouple import config
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -84,6 +85,10 @@ DATABASES = {
         'PASSWORD': config('DB_PASSWORD', default='your_db_password'),
         'HOST': config('DB_HOST', default='db'),
         'PORT': config('DB_PORT', default='5432'),
+        # Reuse connections across requests; set DB_CONN_MAX_AGE=0 when
+        # running behind pgbouncer in transaction pooling mode
+        'CONN_MAX_AGE': config('DB_CONN_MAX_AGE', default=600, cast=int),
+        'CONN_HEALTH_CHECKS': True,
     }
 }
 
@@ -135,7 +140,7 @@ REST_FRAMEWORK = {
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 20,
     'DEFAULT_RENDERER_CLASSES': [
-        'rest_framework.renderers.JSONRenderer',
+        'apps.core.renderers.ORJSONRenderer',
     ],
     'DEFAULT_THROTTLE_CLASSES': [
         'apps.core.rate_limiting.AnonRateThrottle',
@@ -196,8 +201,17 @@ CELERY_ACCEPT_CONTENT = ['json']
 CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = TIME_ZONE
+CELERY_BEAT_SCHEDULE = {
+    # Shortly after midnight: finalise yesterday and start today's row
+    'rollup-bot-analytics': {
+        'task': 'apps.telegram_bot.tasks.rollup_bot_analytics',
+        'schedule': crontab(hour=0, minute=15),
+        'kwargs': {'days': 2},
+    },
+}
 
 # Rate limiting configuration
+RATE_LIMIT_ENABLED = config('RATE_LIMIT_ENABLED', default=True, cast=bool)
 USER_RATE_LIMIT = config('USER_RATE_LIMIT', default='1000/hour')
 ANON_RATE_LIMIT = config('ANON_RATE_LIMIT', default='100/hour')
 NOTIFICATION_RATE_LIMIT = config('NOTIFICATION_RATE_LIMIT', default='50/hour')
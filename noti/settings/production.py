@@ -28,9 +28,6 @@ CSRF_COOKIE_HTTPONLY = True
 # Static files security
 STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 
-# Database security
-DATABASES['default']['CONN_MAX_AGE'] = 60
-
 # Cache security
 CACHES['default']['OPTIONS']['CONNECTION_POOL_KWARGS'] = {
     'max_connections': 50,
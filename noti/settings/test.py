@@ -2,38 +2,58 @@
 Test settings for Noti project.
 """
 
+import logging
+
+from decouple import config
+
 from .base import *
 
-# Use in-memory database for tests
+# Use in-memory database for tests. The schema has no PostgreSQL-only
+# requirements: JSONField works on SQLite, and the BotMessage.content GIN
+# index is created by its migration on PostgreSQL only.
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': ':memory:',
+        # Unset, Django uses a shared-cache in-memory database and clones one
+        # per parallel worker. Point TEST_DB_NAME at a file to let keepdb
+        # reuse the schema across runs.
+        'TEST': {
+            'NAME': config('TEST_DB_NAME', default=None),
+            # Create tables straight from the current models instead of
+            # replaying every migration
+            'MIGRATE': False,
+        },
     }
 }
 
-# Disable migrations for tests
-class DisableMigrations:
-    def __contains__(self, item):
-        return True
-    
-    def __getitem__(self, item):
-        return None
-
-MIGRATION_MODULES = DisableMigrations()
-
 # Password hashers for faster tests
 PASSWORD_HASHERS = [
     'django.contrib.auth.hashers.MD5PasswordHasher',
 ]
 
-# Disable logging during tests
+# Disable logging during tests. LOGGING_CONFIG only stops Django configuring
+# handlers; logging.disable makes every logger call return before formatting
+# its message. A test that needs assertLogs must re-enable it with
+# logging.disable(logging.NOTSET).
 LOGGING_CONFIG = None
+logging.disable(logging.CRITICAL)
 
 # Test-specific settings
-TEST_RUNNER = 'django.test.runner.DiscoverRunner'
+TEST_RUNNER = 'noti.test_runner.NoChecksDiscoverRunner'
 
-# Disable Celery during tests
+# Never reach the live Bot API from tests unless explicitly asked to, e.g.
+# for a release smoke run: USE_REAL_TELEGRAM=1 with a real TELEGRAM_BOT_TOKEN.
+# Otherwise the test runner also refuses every non-loopback connection.
+TEST_ALLOW_NETWORK = config('USE_REAL_TELEGRAM', default=False, cast=bool)
+if not TEST_ALLOW_NETWORK:
+    TELEGRAM_BOT_TOKEN = ''
+
+# Run Celery tasks inline: with eager mode off, .delay() would publish to the
+# Redis broker. The Celery app reads these settings once via
+# config_from_object, so override_settings cannot toggle eager mode per test;
+# tests that are not about a task patch it where it is enqueued (e.g.
+# apps.telegram_bot.views.process_telegram_update) under either runner.
 CELERY_TASK_ALWAYS_EAGER = True
 CELERY_TASK_EAGER_PROPAGATES = True
 
@@ -52,5 +72,17 @@ REST_FRAMEWORK['DEFAULT_AUTHENTICATION_CLASSES'] = [
     'rest_framework.authentication.TokenAuthentication',
 ]
 
+# Encode test client payloads as JSON rather than multipart
+REST_FRAMEWORK['TEST_REQUEST_DEFAULT_FORMAT'] = 'json'
+
+# Skip the global throttles on every test request; the throttle classes are
+# exercised directly in apps.core.tests_rate_limiting
+REST_FRAMEWORK['DEFAULT_THROTTLE_CLASSES'] = []
+REST_FRAMEWORK['DEFAULT_THROTTLE_RATES'] = {}
+
+# Throttles pinned on individual views (and the webhook's own limiter) need
+# Redis, which the dummy cache does not provide; let them allow everything
+RATE_LIMIT_ENABLED = False
+
 # Test-specific CORS settings
 CORS_ALLOW_ALL_ORIGINS = True
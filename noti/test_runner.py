@@ -0,0 +1,78 @@
+"""
+Test runner for the Noti project.
+"""
+
+import functools
+import ipaddress
+import socket
+
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+
+
+def _is_loopback(host):
+    """Return whether a socket address host refers to this machine."""
+    if host == 'localhost':
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+def _loopback_only(connect):
+    """Wrap a socket connect method so only local connections get through."""
+    @functools.wraps(connect)
+    def guarded(sock, address):
+        is_inet = sock.family in (socket.AF_INET, socket.AF_INET6)
+        if is_inet and not _is_loopback(address[0]):
+            raise ConnectionRefusedError(
+                f'Outbound network access is disabled in tests: {address!r}'
+            )
+        return connect(sock, address)
+    
+    return guarded
+
+
+def guard_network():
+    """
+    Refuse non-loopback connections unless ``TEST_ALLOW_NETWORK`` is set.
+    
+    Returns a callable that restores the original socket methods (a no-op
+    when the guard was not installed).
+    """
+    if getattr(settings, 'TEST_ALLOW_NETWORK', False):
+        return lambda: None
+    
+    original = (socket.socket.connect, socket.socket.connect_ex)
+    socket.socket.connect = _loopback_only(socket.socket.connect)
+    socket.socket.connect_ex = _loopback_only(socket.socket.connect_ex)
+    
+    def restore():
+        socket.socket.connect, socket.socket.connect_ex = original
+    
+    return restore
+
+
+class NoChecksDiscoverRunner(DiscoverRunner):
+    """
+    Discover runner that skips system checks before running tests.
+    
+    Configuration is covered by ``manage.py check`` on its own; running the
+    full check framework before every test run only adds startup time.
+    
+    Unless ``TEST_ALLOW_NETWORK`` is set, connections to anything but
+    loopback are refused, so an unmocked call to an external API fails at
+    once instead of waiting on DNS and TCP timeouts.
+    """
+    
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self._restore_network = guard_network()
+    
+    def teardown_test_environment(self, **kwargs):
+        self._restore_network()
+        super().teardown_test_environment(**kwargs)
+    
+    def run_checks(self, databases):
+        pass
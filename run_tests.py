@@ -19,7 +19,12 @@ def run_tests():
     setup_django()
     
     TestRunner = get_runner(settings)
-    test_runner = TestRunner()
+    # Test classes are independent, so spread them over one process per
+    # core; each worker gets its own copy of the test database
+    test_runner = TestRunner(
+        parallel=int(os.environ.get('TEST_PARALLEL', os.cpu_count() or 1)),
+        keepdb=bool(os.environ.get('TEST_KEEPDB')),
+    )
     
     # Test patterns to run
     test_patterns = [